@@ -3,9 +3,11 @@ from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
+import request_metrics
 
 # --- App Configuration ---
 app = FastAPI()
+request_metrics.install(app)
 
 # --- CORS Configuration ---
 # This allows your Next.js frontend (running on http://localhost:3000)
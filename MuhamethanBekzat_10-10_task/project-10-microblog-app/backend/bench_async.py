@@ -0,0 +1,115 @@
+"""Нагрузочный тест: синхронный (пул потоков) и асинхронный (aiosqlite) доступ к БД.
+
+Для каждого режима DB_MODE поднимается отдельный uvicorn на общей заранее
+наполненной базе, и httpx с высокой параллельностью гоняет смесь запросов:
+ленты (общая и авторов) и лайки/анлайки. Кэш ленты отключён
+(FEED_CACHE_SIZE=0), чтобы мерить именно путь до БД.
+
+Запуск: python bench_async.py [параллельность] [секунд] [постов]   (по умолчанию 256 10 20000)
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+DATABASE_URL = f"sqlite:///{DB_PATH}"
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+import httpx  # noqa: E402
+
+from main import FAKE_USERS_DB, PostDB, UserDB, engine  # noqa: E402
+
+PORT = 8765
+USERNAMES = list(FAKE_USERS_DB)
+
+
+def seed(posts: int) -> list:
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": f"Пост номер {i}",
+            "timestamp": start + timedelta(seconds=i),
+            "owner_id": FAKE_USERS_DB[rng.choice(USERNAMES)]["id"],
+        }
+        for i in range(posts)
+    ]
+    with engine.begin() as conn:
+        conn.execute(UserDB.__table__.insert(), [{"id": u["id"], "username": u["username"]} for u in FAKE_USERS_DB.values()])
+        conn.execute(PostDB.__table__.insert(), rows)
+    return [row["id"] for row in rows[-2000:]]
+
+
+async def wait_ready(client):
+    for _ in range(100):
+        try:
+            await client.get("/docs")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn не запустился")
+
+
+async def load(concurrency: int, seconds: float, post_ids: list):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        await wait_ready(client)
+        deadline = time.perf_counter() + seconds
+
+        async def worker(seed):
+            nonlocal errors
+            rng = random.Random(seed)
+            headers = {"Authorization": f"Bearer {rng.choice(USERNAMES)}"}
+            while time.perf_counter() < deadline:
+                roll = rng.random()
+                start = time.perf_counter()
+                if roll < 0.6:
+                    response = await client.get("/api/posts?limit=20", headers=headers)
+                elif roll < 0.9:
+                    response = await client.get(f"/api/users/{rng.choice(USERNAMES)}/posts?limit=20", headers=headers)
+                elif roll < 0.95:
+                    response = await client.post(f"/api/posts/{rng.choice(post_ids)}/like", headers=headers)
+                else:
+                    response = await client.delete(f"/api/posts/{rng.choice(post_ids)}/like", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def run_mode(mode: str, concurrency: int, seconds: float, post_ids: list) -> None:
+    env = dict(os.environ, DB_MODE=mode, DATABASE_URL=DATABASE_URL, FEED_CACHE_SIZE="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        latencies, errors = asyncio.run(load(concurrency, seconds, post_ids))
+    finally:
+        server.terminate()
+        server.wait()
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000  # noqa: E731
+    print(
+        f"{mode:<6} {len(latencies) / seconds:8.0f} запросов/с | p50 {pct(0.5):7.1f} мс"
+        f" | p99 {pct(0.99):7.1f} мс | ошибок {errors}"
+    )
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    concurrency, seconds, posts = args + [256, 10, 20000][len(args):]
+    post_ids = seed(int(posts))
+    print(f"База: {int(posts):,} постов, параллельность {int(concurrency)}")
+    for mode in ("sync", "async"):
+        run_mode(mode, int(concurrency), seconds, post_ids)
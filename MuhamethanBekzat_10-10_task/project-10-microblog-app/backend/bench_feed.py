@@ -0,0 +1,107 @@
+"""Бенчмарк ленты: число SQL-запросов и задержка старой (N+1) и новой реализации.
+
+Создаёт отдельную SQLite-базу, наполняет её постами/лайками и меряет
+страницу ленты. Старый вариант (COUNT и поиск лайка на каждый пост,
+ленивая загрузка автора) повторён здесь для сравнения.
+
+Запуск: python bench_feed.py [постов] [размер страницы]   (по умолчанию 100000 1000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from main import LikeDB, Post, PostDB, SessionLocal, UserDB, engine, fetch_feed  # noqa: E402
+
+USERS = 1000
+LIKES_PER_POST = 3
+
+
+def seed(posts: int) -> None:
+    rng = random.Random(0)
+    users = [(str(i), f"user{i}") for i in range(1, USERS + 1)]
+    start_ts = datetime(2024, 1, 1)
+    post_rows = [
+        (str(uuid.uuid4()), f"Пост номер {i}", start_ts + timedelta(seconds=i), str(rng.randint(1, USERS)))
+        for i in range(posts)
+    ]
+    # Уникальная пара (user_id, post_id) — как того требует _user_post_uc
+    like_pairs = {
+        (str(rng.randint(1, USERS)), post_id)
+        for post_id, *_ in post_rows
+        for _ in range(rng.randint(0, 2 * LIKES_PER_POST))
+    }
+    like_rows = [(str(uuid.uuid4()), user_id, post_id) for user_id, post_id in like_pairs]
+    with engine.begin() as conn:
+        conn.execute(UserDB.__table__.insert(), [{"id": i, "username": u} for i, u in users])
+        conn.execute(PostDB.__table__.insert(), [
+            {"id": i, "text": t, "timestamp": ts, "owner_id": o} for i, t, ts, o in post_rows
+        ])
+        conn.execute(LikeDB.__table__.insert(), [
+            {"id": i, "user_id": u, "post_id": p} for i, u, p in like_rows
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+
+def legacy_feed(db, current_user_id, limit):
+    posts = db.query(PostDB).order_by(PostDB.timestamp.desc()).limit(limit).all()
+    result = []
+    for post in posts:
+        likes_count = db.query(LikeDB).filter_by(post_id=post.id).count()
+        liked_by_me = db.query(LikeDB).filter_by(post_id=post.id, user_id=current_user_id).first() is not None
+        result.append(Post(
+            id=post.id, text=post.text, timestamp=post.timestamp, owner_id=post.owner_id,
+            owner_username=post.owner.username if post.owner else "",
+            likes=likes_count, liked_by_me=liked_by_me,
+        ))
+    return result
+
+
+def measure(name, fn, repeat=3):
+    queries = []
+
+    def count(*_):
+        queries.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        timings = []
+        for _ in range(repeat):
+            queries.clear()
+            db = SessionLocal()
+            start = time.perf_counter()
+            posts = fn(db)
+            timings.append(time.perf_counter() - start)
+            db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    print(f"{name:<28} постов {len(posts):5d} | SQL-запросов {len(queries):6d} | {min(timings) * 1000:9.1f} мс")
+    return posts
+
+
+def main_bench(posts: int, page: int) -> None:
+    start = time.perf_counter()
+    seed(posts)
+    print(f"База {posts:,} постов готова за {time.perf_counter() - start:.1f} с ({DB_PATH})")
+
+    old = measure("N+1 (старая лента)", lambda db: legacy_feed(db, "1", page))
+    new = measure("один запрос (fetch_feed)", lambda db: fetch_feed(db, "1", limit=page))
+    assert [(p.id, p.likes, p.liked_by_me) for p in old] == [(p.id, p.likes, p.liked_by_me) for p in new]
+
+    cursor = main.encode_cursor(new[-1].timestamp, new[-1].id)
+    measure("следующая страница (keyset)", lambda db: fetch_feed(db, "1", cursor=cursor, limit=page))
+    measure("лента автора", lambda db: fetch_feed(db, "1", owner_id="7", limit=page))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main_bench(*(args + [100_000, 1000][len(args):]))
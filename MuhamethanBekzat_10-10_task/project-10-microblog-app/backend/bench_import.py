@@ -0,0 +1,66 @@
+"""Бенчмарк импорта: генерирует posts.json в старом формате и загружает его через import_posts.
+
+Файл пишется потоково, в формате write_posts (indent=4, ensure_ascii=False).
+Скорость загрузки (строк/с) печатает сам импорт.
+
+Запуск: python bench_import.py [постов] [размер пачки]   (по умолчанию 1000000 50000)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+WORK_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import text  # noqa: E402
+
+from database import engine  # noqa: E402
+from import_posts import import_posts  # noqa: E402
+
+USERS = 1000
+WORDS = ["привет", "мир", "сегодня", "погода", "кофе", "код", "релиз", "баг", "фича", "отпуск"]
+
+
+def generate(path: str, posts: int) -> None:
+    rng = random.Random(0)
+    start_ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(posts):
+            owner = rng.randint(1, USERS)
+            item = {
+                "id": str(uuid.uuid4()),
+                "text": " ".join(rng.choices(WORDS, k=rng.randint(3, 20))),
+                "timestamp": (start_ts + timedelta(seconds=i)).isoformat(),
+                "owner_id": str(owner),
+                "owner_username": f"user{owner}",
+                "likes": 0,
+                "liked_by_me": False,
+            }
+            f.write(("," if i else "") + "\n    " + json.dumps(item, indent=4, ensure_ascii=False).replace("\n", "\n    "))
+        f.write("\n]")
+
+
+def main_bench(posts: int, batch: int) -> None:
+    path = os.path.join(WORK_DIR, "posts.json")
+    start = time.perf_counter()
+    generate(path, posts)
+    print(f"posts.json: {posts:,} постов, {os.path.getsize(path) / 2 ** 20:,.0f} МБ за {time.perf_counter() - start:.1f} с")
+
+    start = time.perf_counter()
+    import_posts(path, batch)
+    print(f"Всего: {time.perf_counter() - start:.1f} с")
+    with engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM posts")).scalar()
+    assert count == posts, count
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main_bench(*(args + [1_000_000, 50_000][len(args):]))
@@ -0,0 +1,95 @@
+"""Бенчмарк параллельных лайков: SELECT+INSERT против INSERT ... ON CONFLICT с триггером-счётчиком.
+
+Несколько потоков лайкают и снимают лайки с небольшого набора «горячих»
+постов — худший случай для гонок по _user_post_uc. После прогона проверяется,
+что posts.like_count совпадает с COUNT(*) по likes.
+
+Запуск: python bench_likes.py [потоков] [операций на поток]   (по умолчанию 16 500)
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+
+from main import LikeDB, PostDB, SessionLocal, add_like, engine, remove_like  # noqa: E402
+
+HOT_POSTS = 20
+USERS = 200
+
+
+def legacy_like(db, user_id, post_id):
+    post = db.query(PostDB).filter(PostDB.id == post_id).first()
+    if not post:
+        return
+    if db.query(LikeDB).filter_by(user_id=user_id, post_id=post_id).first():
+        return
+    db.add(LikeDB(user_id=user_id, post_id=post_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Гонка: между SELECT и INSERT лайк успел поставить другой поток
+        db.rollback()
+
+
+def legacy_unlike(db, user_id, post_id):
+    like = db.query(LikeDB).filter_by(user_id=user_id, post_id=post_id).first()
+    if like:
+        db.delete(like)
+        db.commit()
+
+
+def run(name, like, unlike, threads, ops, post_ids):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM likes"))
+        conn.execute(text("UPDATE posts SET like_count = 0"))
+
+    def worker(seed):
+        rng = random.Random(seed)
+        db = SessionLocal()
+        try:
+            for _ in range(ops):
+                user_id, post_id = str(rng.randint(1, USERS)), rng.choice(post_ids)
+                (like if rng.random() < 0.7 else unlike)(db, user_id, post_id)
+        finally:
+            db.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        mismatched = conn.execute(text(
+            "SELECT COUNT(*) FROM posts WHERE like_count != "
+            "(SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+        )).scalar()
+    print(f"{name:<22} {threads * ops / elapsed:8.0f} операций/с | постов с неверным счётчиком: {mismatched}")
+
+
+def main_bench(threads: int, ops: int) -> None:
+    post_ids = [str(uuid.uuid4()) for _ in range(HOT_POSTS)]
+    with engine.begin() as conn:
+        conn.execute(PostDB.__table__.insert(), [
+            {"id": post_id, "text": "горячий пост", "timestamp": datetime.now(), "owner_id": "1"}
+            for post_id in post_ids
+        ])
+    run("SELECT + INSERT", legacy_like, legacy_unlike, threads, ops, post_ids)
+    run("ON CONFLICT + триггер", add_like, remove_like, threads, ops, post_ids)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main_bench(*(args + [16, 500][len(args):]))
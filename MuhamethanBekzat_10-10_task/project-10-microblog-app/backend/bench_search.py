@@ -0,0 +1,98 @@
+"""Бенчмарк поиска: построение FTS5-индекса и задержка запросов против LIKE '%x%'.
+
+Наполняет отдельную базу постами из случайных слов (индекс при вставке
+отключён — триггер удаляется на время загрузки), затем меряет полный
+'rebuild' индекса и поиск: FTS5 (search_posts) и полный скан по LIKE.
+Для очень частых слов FTS5 сортирует по bm25 все совпадения, а LIKE с LIMIT
+останавливается на первых найденных строках — выигрыш индекса виден на
+редких словах и пустой выдаче, где LIKE сканирует всю таблицу.
+
+Запуск: python bench_search.py [постов] [размер страницы]   (по умолчанию 1000000 50)
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import text  # noqa: E402
+
+from database import ASSIGN_SEARCH_IDS  # noqa: E402
+from main import PostDB, SessionLocal, engine, search_posts  # noqa: E402
+
+USERS = 1000
+BATCH = 50_000
+# Частые и редкие слова: распределение частот близко к естественному языку
+VOCABULARY = [f"слово{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+QUERIES = ["слово0", "слово10", "слово500", "слово15000", "слово3 слово7", "нетутакого"]
+
+
+def seed(posts: int) -> None:
+    rng = random.Random(0)
+    start_ts = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER posts_fts_insert"))
+        for offset in range(0, posts, BATCH):
+            conn.execute(PostDB.__table__.insert(), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "text": " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(5, 30))),
+                    "timestamp": start_ts + timedelta(seconds=i),
+                    "owner_id": str(rng.randint(1, USERS)),
+                }
+                for i in range(offset, min(offset + BATCH, posts))
+            ])
+        conn.execute(text(ASSIGN_SEARCH_IDS))
+
+
+def rebuild() -> float:
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('optimize')"))
+    return time.perf_counter() - start
+
+
+def timed(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, sorted(timings)[len(timings) // 2] * 1000
+
+
+def like_scan(db, q: str, limit: int):
+    conditions = " AND ".join(f"text LIKE :t{i}" for i in range(len(q.split())))
+    params = {f"t{i}": f"%{term}%" for i, term in enumerate(q.split())}
+    return db.execute(text(f"SELECT id FROM posts WHERE {conditions} LIMIT {limit}"), params).all()
+
+
+def main_bench(posts: int, page: int) -> None:
+    start = time.perf_counter()
+    seed(posts)
+    print(f"База {posts:,} постов готова за {time.perf_counter() - start:.1f} с ({DB_PATH})")
+    print(f"Построение FTS5-индекса: {rebuild():.1f} с")
+
+    db = SessionLocal()
+    try:
+        print(f"{'запрос':<22} {'FTS5, мс':>10} {'след. стр., мс':>15} {'LIKE, мс':>10}")
+        for q in QUERIES:
+            (found, cursor), fts_ms = timed(lambda: search_posts(db, "1", q, None, page))
+            next_ms = timed(lambda: search_posts(db, "1", q, cursor, page))[1] if cursor else 0.0
+            like_ms = timed(lambda: like_scan(db, q, page), repeat=1)[1]
+            print(f"{q:<22} {fts_ms:10.2f} {next_ms:15.2f} {like_ms:10.1f}   (найдено на странице: {len(found)})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main_bench(*(args + [1_000_000, 50][len(args):]))
@@ -0,0 +1,181 @@
+"""Движок SQLAlchemy, модели и схема базы микроблога.
+
+Импорт модуля схему не трогает: таблицы, индексы и триггеры создаёт init_db().
+Приложение вызывает её при импорте main, а импорт постов (import_posts.py) —
+сам и без вторичных индексов posts, которые он на время загрузки снимает.
+"""
+import os
+import uuid
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, String, DateTime, Integer, ForeignKey, UniqueConstraint, Index,
+)
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import request_metrics
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
+# DB_MODE=sync — блокирующий движок, запросы идут в пуле потоков;
+# DB_MODE=async — тот же код через AsyncSession + aiosqlite, без занятия потоков
+DB_MODE = os.getenv("DB_MODE", "sync")
+ENGINE_OPTIONS = {
+    "connect_args": {"check_same_thread": False, "timeout": 30},
+    # Чтений много и они параллельны (WAL), запись всё равно одна — пул под читателей
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+}
+# Синхронный движок есть всегда: на нём создаются таблицы, индексы и триггеры
+engine = create_engine(DATABASE_URL, **ENGINE_OPTIONS)
+async_engine = None
+if DB_MODE == "async":
+    async_engine = create_async_engine(
+        os.getenv("ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)),
+        **ENGINE_OPTIONS,
+    )
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL: читатели не блокируют писателя; synchronous=NORMAL в WAL безопасен при сбое процесса."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 МБ страничного кэша на соединение
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+request_metrics.instrument_engine(engine)
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    request_metrics.instrument_engine(async_engine.sync_engine)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+Base = declarative_base()
+
+class UserDB(Base):
+    __tablename__ = "users"
+    id = Column(String, primary_key=True, index=True)
+    username = Column(String, unique=True, index=True)
+    posts = relationship("PostDB", back_populates="owner")
+
+class PostDB(Base):
+    __tablename__ = "posts"
+    id = Column(String, primary_key=True, index=True)
+    text = Column(String)
+    timestamp = Column(DateTime)
+    owner_id = Column(String, ForeignKey("users.id"))
+    # Денормализованный счётчик лайков, поддерживается триггерами на likes
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Ключ поста в posts_fts. Неявный rowid не годится: у таблицы с TEXT-ключом
+    # VACUUM может его перенумеровать, и поиск молча начнёт отдавать чужие посты.
+    # Назначается триггером posts_fts_insert, при массовой загрузке — ASSIGN_SEARCH_IDS
+    search_id = Column(Integer)
+    owner = relationship("UserDB", back_populates="posts")
+    # Индексы под keyset-пагинацию ленты: общей и ленты одного автора
+    __table_args__ = (
+        Index("ix_posts_timestamp_id", "timestamp", "id"),
+        Index("ix_posts_owner_timestamp_id", "owner_id", "timestamp", "id"),
+        Index("ix_posts_search_id", "search_id", unique=True),
+    )
+
+class LikeDB(Base):
+    __tablename__ = "likes"
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"))
+    post_id = Column(String, ForeignKey("posts.id"))
+    __table_args__ = (
+        UniqueConstraint('user_id', 'post_id', name='_user_post_uc'),
+        Index("ix_likes_post_id", "post_id"),
+    )
+
+# search_id для постов без него (вставленных без триггера): rowid уникален,
+# а сдвиг на текущий максимум не даёт пересечься с уже выданными
+ASSIGN_SEARCH_IDS = (
+    "UPDATE posts SET search_id = rowid + (SELECT COALESCE(MAX(search_id), 0) FROM posts) "
+    "WHERE search_id IS NULL"
+)
+
+def migrate_search_ids():
+    """Добавляет posts.search_id в старую базу и раздаёт его постам, у которых его нет."""
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("posts")}
+        if "search_id" not in columns:
+            conn.execute(text("ALTER TABLE posts ADD COLUMN search_id INTEGER"))
+        conn.execute(text(ASSIGN_SEARCH_IDS))
+
+def migrate_like_counts():
+    """Добавляет posts.like_count в старую базу и триггеры, которые его поддерживают."""
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("posts")}
+        if "like_count" not in columns:
+            conn.execute(text("ALTER TABLE posts ADD COLUMN like_count INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text(
+                "UPDATE posts SET like_count = (SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+            ))
+        # Триггер срабатывает в той же транзакции, что и INSERT/DELETE лайка
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS likes_count_insert AFTER INSERT ON likes BEGIN "
+            "UPDATE posts SET like_count = like_count + 1 WHERE id = NEW.post_id; END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS likes_count_delete AFTER DELETE ON likes BEGIN "
+            "UPDATE posts SET like_count = like_count - 1 WHERE id = OLD.post_id; END"
+        ))
+
+def setup_fulltext_search():
+    """FTS5-индекс по posts.text (external content) и триггеры синхронизации с posts.
+
+    Строки индекса ссылаются на posts.search_id, который переживает VACUUM.
+    Индекс старого вида (по rowid) пересоздаётся.
+    """
+    with engine.begin() as conn:
+        definition = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+        )).scalar()
+        exists_already = definition is not None and "content_rowid='search_id'" in definition
+        if definition is not None and not exists_already:
+            for trigger in ("posts_fts_insert", "posts_fts_delete", "posts_fts_update"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            conn.execute(text("DROP TABLE posts_fts"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+            "text, content='posts', content_rowid='search_id', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        # Один триггер и выдаёт search_id, и индексирует: порядок нескольких
+        # AFTER INSERT триггеров SQLite не гарантирует
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN "
+            "UPDATE posts SET search_id = (SELECT COALESCE(MAX(search_id), 0) + 1 FROM posts) "
+            "WHERE rowid = NEW.rowid AND search_id IS NULL; "
+            "INSERT INTO posts_fts(rowid, text) SELECT search_id, text FROM posts WHERE rowid = NEW.rowid; END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, text) VALUES ('delete', OLD.search_id, OLD.text); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF text ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, text) VALUES ('delete', OLD.search_id, OLD.text); "
+            "INSERT INTO posts_fts(rowid, text) VALUES (NEW.search_id, NEW.text); END"
+        ))
+        if not exists_already:
+            # Индекс добавлен к базе, где посты уже есть
+            conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+
+def init_db(add_missing_indexes: bool = True):
+    """Создаёт таблицы, индексы, счётчик лайков и FTS-индекс; повторный вызов ничего не ломает.
+
+    add_missing_indexes=False — не достраивать индексы в уже существующих
+    таблицах (импорт снимает их на время загрузки и строит сам в конце).
+    """
+    Base.metadata.create_all(bind=engine)
+    migrate_search_ids()
+    if add_missing_indexes:
+        # create_all не добавляет новые индексы в уже существующие таблицы
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    migrate_like_counts()
+    setup_fulltext_search()
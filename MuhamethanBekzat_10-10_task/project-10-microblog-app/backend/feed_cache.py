@@ -0,0 +1,192 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+LIKED_TRUE = b',"liked_by_me":true}'
+LIKED_FALSE = b',"liked_by_me":false}'
+
+
+class FeedPage:
+    """Общая для всех пользователей часть страницы ленты в сериализованном виде.
+
+    Каждый пост хранится как JSON-объект без поля liked_by_me и без
+    закрывающей скобки, поэтому ответ конкретному пользователю собирается
+    склейкой байтов без повторной сериализации.
+    """
+
+    __slots__ = ("post_ids", "fragments", "next_cursor")
+
+    def __init__(self, post_ids: List[str], fragments: List[bytes], next_cursor: Optional[str]):
+        self.post_ids = post_ids
+        self.fragments = fragments
+        self.next_cursor = next_cursor
+
+    @classmethod
+    def from_json(cls, post_ids: List[str], posts_json: Iterable[bytes], next_cursor: Optional[str]) -> "FeedPage":
+        """posts_json — посты, сериализованные без liked_by_me (model_dump_json(exclude=...))."""
+        fragments = []
+        for body in posts_json:
+            if not body.startswith(b"{") or not body.endswith(b"}") or body == b"{}":
+                raise ValueError(f"ожидался непустой JSON-объект поста, получено {body[:40]!r}")
+            fragments.append(body[:-1])
+        return cls(post_ids, fragments, next_cursor)
+
+    def render(self, liked: Set[str]) -> bytes:
+        return b"[" + b",".join(
+            fragment + (LIKED_TRUE if post_id in liked else LIKED_FALSE)
+            for post_id, fragment in zip(self.post_ids, self.fragments)
+        ) + b"]"
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class ChangeLog:
+    """Номер последнего изменения по каждому ключу — чтобы не кэшировать то, что поменялось, пока его считали.
+
+    Перед расчётом берётся since = clock, перед сохранением проверяется
+    unchanged_since(since, ключи). Журнал ограничен: при переполнении он
+    очищается, и всё начатое до этого считается устаревшим. Потокобезопасность
+    — на вызывающем (вызовы под его блокировкой).
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self.clock = 0
+        self._floor = 0
+        self._changed: Dict[Hashable, int] = {}
+
+    def touch(self, key: Hashable) -> None:
+        self.clock += 1
+        self._changed[key] = self.clock
+        if len(self._changed) > self.maxsize:
+            self.touch_all()
+
+    def touch_all(self) -> None:
+        self.clock += 1
+        self._changed.clear()
+        self._floor = self.clock
+
+    def unchanged_since(self, since: int, keys: Iterable[Hashable]) -> bool:
+        if since < self._floor:
+            return False
+        changed = self._changed
+        return all(changed.get(key, 0) <= since for key in keys)
+
+
+class FeedCache:
+    """Ограниченный LRU-кэш страниц ленты с точечной инвалидацией.
+
+    Ключ страницы — (owner_id или None для общей ленты, cursor, limit).
+    Страница после курсора зависит только от постов старше курсора, поэтому:
+      * новый пост меняет лишь первые страницы общей ленты и ленты автора;
+      * удаление поста и лайк/анлайк меняют лишь страницы, где этот пост есть.
+    Кэш живёт в памяти процесса: при нескольких воркерах у каждого свой.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._pages: "OrderedDict[Hashable, FeedPage]" = OrderedDict()
+        self._pages_by_post: Dict[str, Set[Hashable]] = {}
+        self._lock = Lock()
+        # Изменения постов ("post", id) и начала лент ("head", owner_id или None):
+        # страницу, посчитанную до изменения хотя бы одного из её постов, не сохраняем
+        self._changes = ChangeLog()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], FeedPage]) -> FeedPage:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                return page
+            since = self._changes.clock
+        page = build()
+        with self._lock:
+            depends_on = [("post", post_id) for post_id in page.post_ids]
+            if key[1] is None:
+                depends_on.append(("head", key[0]))
+            if self._changes.unchanged_since(since, depends_on):
+                self._store(key, page)
+        return page
+
+    def _store(self, key: Hashable, page: FeedPage) -> None:
+        self._drop(key)
+        self._pages[key] = page
+        for post_id in page.post_ids:
+            self._pages_by_post.setdefault(post_id, set()).add(key)
+        while len(self._pages) > self.maxsize:
+            self._drop(next(iter(self._pages)))
+
+    def _drop(self, key: Hashable) -> None:
+        page = self._pages.pop(key, None)
+        if page is None:
+            return
+        for post_id in page.post_ids:
+            keys = self._pages_by_post.get(post_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._pages_by_post[post_id]
+
+    def post_created(self, owner_id: str) -> None:
+        with self._lock:
+            self._changes.touch(("head", None))
+            self._changes.touch(("head", owner_id))
+            for key in [k for k in self._pages if k[1] is None and k[0] in (None, owner_id)]:
+                self._drop(key)
+
+    def post_changed(self, post_id: str) -> None:
+        with self._lock:
+            self._changes.touch(("post", post_id))
+            for key in list(self._pages_by_post.get(post_id, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._changes.touch_all()
+            self._pages.clear()
+            self._pages_by_post.clear()
+
+
+class UserLikesCache:
+    """Множества id постов, лайкнутых пользователем, для наложения liked_by_me.
+
+    Загружаются одним запросом при первом обращении и дальше обновляются
+    самими эндпоинтами like/unlike; число пользователей в памяти ограничено.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._likes: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._lock = Lock()
+        # Лайки/анлайки по пользователям: чужие лайки загрузку не отменяют
+        self._changes = ChangeLog()
+
+    def get(self, user_id: str, load: Callable[[], Iterable[str]]) -> Set[str]:
+        with self._lock:
+            liked = self._likes.get(user_id)
+            if liked is not None:
+                self._likes.move_to_end(user_id)
+                return liked
+            since = self._changes.clock
+        liked = set(load())
+        with self._lock:
+            # Пока грузили, пользователь мог лайкнуть — такое множество не кэшируем
+            if not self._changes.unchanged_since(since, (user_id,)):
+                return liked
+            self._likes[user_id] = liked
+            while len(self._likes) > self.maxsize:
+                self._likes.popitem(last=False)
+        return liked
+
+    def update(self, user_id: str, post_id: str, liked: bool) -> None:
+        with self._lock:
+            self._changes.touch(user_id)
+            likes = self._likes.get(user_id)
+            if likes is not None:
+                if liked:
+                    likes.add(post_id)
+                else:
+                    likes.discard(post_id)
@@ -0,0 +1,228 @@
+"""Перенос постов из старого data/posts.json в базу (DATABASE_URL, по умолчанию data/app.db).
+
+Файл читается потоково: в памяти только текущий кусок и текущая пачка строк.
+Пользователи и посты вставляются пачками через executemany с upsert
+(повторный импорт обновляет текст/время/автора, а не дублирует посты).
+На время загрузки вторичные индексы и FTS-триггеры posts снимаются, в конце
+индексы строятся заново одним проходом, а поисковый индекс перестраивается.
+
+Импорт возобновляемый: вместе с каждой пачкой в той же транзакции
+сохраняется байтовое смещение в файле, и повторный запуск продолжает с него.
+Поле likes из JSON не переносится: posts.like_count считается триггерами по
+таблице likes, а в старом файле нет, кто именно лайкал.
+
+Запускать при остановленном приложении:
+    python import_posts.py [путь к json] [--batch 50000] [--restart]
+"""
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Tuple
+
+from sqlalchemy import text
+
+# Только движок и модели: main при импорте создаёт схему и достраивает индексы posts,
+# которые импорт на время загрузки снимает
+from database import ASSIGN_SEARCH_IDS, PostDB, engine, init_db, setup_fulltext_search
+
+# Старое файловое хранилище постов (main.DB_FILE)
+DB_FILE = "data/posts.json"
+CHUNK_SIZE = 1 << 20
+# Недоразобранный хвост длиннее этого (символов) — битый файл, а не объект на границе куска
+MAX_PENDING = 8 * CHUNK_SIZE
+# Индексы posts, которые мешают массовой вставке; первичный ключ нужен для upsert
+BULK_DROPPED_INDEXES = [index for index in PostDB.__table__.indexes]
+FTS_TRIGGERS = ("posts_fts_insert", "posts_fts_update", "posts_fts_delete")
+
+UPSERT_USER = "INSERT INTO users (id, username) VALUES (?, ?) ON CONFLICT DO NOTHING"
+UPSERT_POST = (
+    "INSERT INTO posts (id, text, timestamp, owner_id) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET text = excluded.text, timestamp = excluded.timestamp, "
+    "owner_id = excluded.owner_id"
+)
+# Пробелы по RFC 8259; \s съел бы U+00A0/U+2028 и сбил байтовое смещение
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(f: BinaryIO, offset: int = 0) -> Iterator[Tuple[dict, int]]:
+    """Элементы JSON-массива верхнего уровня и байтовое смещение сразу после каждого.
+
+    offset — позиция, на которой остановился прошлый запуск (0 — начало файла).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    f.seek(offset)
+    buf, pos, eof = "", 0, False
+    expect_open = offset == 0
+    # Продолжение всегда начинается сразу после элемента, дальше нужна ',' или ']'
+    need_comma = offset > 0
+    after_comma = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+        return not eof
+
+    while True:
+        # Пробелы — ASCII, поэтому символы и байты здесь совпадают
+        end = WHITESPACE.match(buf, pos).end()
+        offset += end - pos
+        pos = end
+        if pos == len(buf):
+            if fill():
+                continue
+            raise ValueError("файл оборвался: нет закрывающей ']'")
+        char = buf[pos]
+        if expect_open:
+            if char != "[":
+                raise ValueError("ожидался JSON-массив")
+            expect_open = False
+            offset += 1
+            pos += 1
+            continue
+        if char == "]" and not after_comma:
+            return
+        if need_comma:
+            if char != ",":
+                raise ValueError(f"битый JSON на байте {offset:,}: ожидалась ',' или ']'")
+            need_comma, after_comma = False, True
+            offset += 1
+            pos += 1
+            continue
+        if char == ",":
+            raise ValueError(f"битый JSON на байте {offset:,}: лишняя ','")
+        if char == "]":
+            raise ValueError(f"битый JSON на байте {offset:,}: ',' перед ']'")
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            # Объект разрезан границей куска — дочитываем, но не до конца файла
+            if len(buf) - pos <= MAX_PENDING and fill():
+                continue
+            at = offset + len(buf[pos:e.pos].encode("utf-8"))
+            raise ValueError(f"битый JSON на байте {at:,}: {e.msg}") from e
+        offset += len(buf[pos:end].encode("utf-8"))
+        pos = end
+        need_comma, after_comma = True, False
+        yield item, offset
+
+
+def db_timestamp(value: str) -> str:
+    """ISO-время из JSON -> UTC в формате, в каком DateTime пишет SQLAlchemy (иначе сломается сортировка ленты)."""
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.isoformat(" ", "microseconds")
+
+
+def prepare(conn, source: str, restart: bool) -> Tuple[int, int, bool]:
+    """Таблица прогресса импорта; возвращает (смещение, строк уже загружено, завершён ли)."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS import_progress ("
+        "source TEXT PRIMARY KEY, offset INTEGER NOT NULL, rows INTEGER NOT NULL, done INTEGER NOT NULL)"
+    )
+    if restart:
+        conn.execute("DELETE FROM import_progress WHERE source = ?", (source,))
+    row = conn.execute("SELECT offset, rows, done FROM import_progress WHERE source = ?", (source,)).fetchone()
+    conn.commit()
+    return (row[0], row[1], bool(row[2])) if row else (0, 0, False)
+
+
+def drop_bulk_indexes(conn) -> None:
+    for name in FTS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for index in BULK_DROPPED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index.name}")
+    conn.commit()
+
+
+def rebuild_indexes() -> None:
+    # Посты загружались без триггера posts_fts_insert — ключи для поиска раздаём разом
+    with engine.begin() as conn:
+        conn.execute(text(ASSIGN_SEARCH_IDS))
+    for index in BULK_DROPPED_INDEXES:
+        index.create(bind=engine, checkfirst=True)
+    setup_fulltext_search()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+        conn.execute(text("ANALYZE"))
+
+
+def import_posts(path: str, batch_size: int = 50_000, restart: bool = False) -> int:
+    source = os.path.abspath(path)
+    init_db(add_missing_indexes=False)
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        offset, total, done = prepare(conn, source, restart)
+        if done:
+            print(f"{path} уже импортирован ({total:,} постов); --restart, чтобы загрузить заново")
+            return 0
+        if offset:
+            print(f"Продолжаю с байта {offset:,} (уже загружено {total:,} постов)")
+        drop_bulk_indexes(conn)
+
+        users = {row[0] for row in conn.execute("SELECT id FROM users")}
+        start = last_report = time.perf_counter()
+        imported = 0
+        posts = []
+        new_users = []
+
+        def flush(offset: int) -> None:
+            conn.executemany(UPSERT_USER, new_users)
+            conn.executemany(UPSERT_POST, posts)
+            conn.execute(
+                "INSERT INTO import_progress (source, offset, rows, done) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT (source) DO UPDATE SET offset = excluded.offset, rows = excluded.rows",
+                (source, offset, total + imported),
+            )
+            conn.commit()
+            new_users.clear()
+            posts.clear()
+
+        with open(path, "rb") as f:
+            for item, offset in iter_json_array(f, offset):
+                owner_id = item["owner_id"]
+                if owner_id not in users:
+                    users.add(owner_id)
+                    new_users.append((owner_id, item.get("owner_username") or owner_id))
+                posts.append((item["id"], item["text"], db_timestamp(item["timestamp"]), owner_id))
+                imported += 1
+                if len(posts) >= batch_size:
+                    flush(offset)
+                    now = time.perf_counter()
+                    if now - last_report >= 5:
+                        print(f"  {total + imported:,} постов, {imported / (now - start):,.0f} строк/с")
+                        last_report = now
+            flush(offset)
+        load_seconds = time.perf_counter() - start
+    finally:
+        raw.close()
+
+    print(f"Загружено {imported:,} постов за {load_seconds:.1f} с ({imported / max(load_seconds, 1e-9):,.0f} строк/с)")
+    start = time.perf_counter()
+    rebuild_indexes()
+    # Завершённым импорт считается только с готовыми индексами: обрыв на перестройке повторит её
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE import_progress SET done = 1 WHERE source = :source"), {"source": source})
+    print(f"Индексы перестроены за {time.perf_counter() - start:.1f} с")
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт постов из JSON в SQLite")
+    parser.add_argument("path", nargs="?", default=DB_FILE)
+    parser.add_argument("--batch", type=int, default=50_000, help="постов в одной транзакции")
+    parser.add_argument("--restart", action="store_true", help="забыть сохранённый прогресс и начать сначала")
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        sys.exit(f"Файл {args.path} не найден")
+    import_posts(args.path, args.batch, args.restart)
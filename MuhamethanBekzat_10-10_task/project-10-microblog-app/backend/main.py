@@ -1,19 +1,29 @@
+import base64
 import json
+import os
 import uuid
 from datetime import datetime, timezone
-from fastapi import FastAPI, Depends, HTTPException, status, Header, Path
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Path, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Annotated
+from typing import List, Dict, Annotated, Optional, Tuple, Union
 import aiofiles
-from sqlalchemy import create_engine, Column, String, DateTime, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship, Session
+from sqlalchemy import delete, func, literal, select, exists, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from feed_cache import FeedCache, FeedPage, UserLikesCache, etag_for
+import request_metrics
+from request_metrics import span, timed
+from database import AsyncSessionLocal, LikeDB, PostDB, SessionLocal, UserDB, engine, init_db
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- CORS ---
 origins = ["http://localhost:3000"]
-app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=["X-Next-Cursor", "ETag"])
 
 DB_FILE = "data/posts.json"
 
@@ -41,42 +51,17 @@ class User(BaseModel):
     id: str
     username: str
 
-# --- SQLAlchemy модели ---
-DATABASE_URL = "sqlite:///./data/app.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-class UserDB(Base):
-    __tablename__ = "users"
-    id = Column(String, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
-    posts = relationship("PostDB", back_populates="owner")
-
-class PostDB(Base):
-    __tablename__ = "posts"
-    id = Column(String, primary_key=True, index=True)
-    text = Column(String)
-    timestamp = Column(DateTime)
-    owner_id = Column(String, ForeignKey("users.id"))
-    owner = relationship("UserDB", back_populates="posts")
-
-class LikeDB(Base):
-    __tablename__ = "likes"
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"))
-    post_id = Column(String, ForeignKey("posts.id"))
-    __table_args__ = (UniqueConstraint('user_id', 'post_id', name='_user_post_uc'),)
-
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
+# --- База данных (движок, модели и схема — в database.py) ---
+init_db()
 
 # --- Вспомогательные функции для работы с файлом ---
+@timed("io")
 async def read_posts() -> List[Post]:
     async with aiofiles.open(DB_FILE, mode='r', encoding='utf-8') as f:
         content = await f.read()
         return [Post(**item) for item in json.loads(content)] if content else []
 
+@timed("io")
 async def write_posts(posts: List[Post]):
     export_data = [post.model_dump(mode='json') for post in posts]
     async with aiofiles.open(DB_FILE, mode='w', encoding='utf-8') as f:
@@ -106,43 +91,231 @@ async def login(form_data: Dict[str, str]):
     return {"access_token": user["username"], "token_type": "bearer", "user": {"id": user["id"], "username": user["username"]}}
 
 # --- Зависимость для получения сессии БД ---
-def get_db():
+class SyncDB:
+    """Функции доступа к БД выполняются в пуле потоков с обычной Session."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def run(self, fn, *args):
+        return await run_in_threadpool(fn, self.session, *args)
+
+class AsyncDB:
+    """Те же функции через AsyncSession.run_sync: запросы ждут aiosqlite, а не поток."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def run(self, fn, *args):
+        return await self.session.run_sync(fn, *args)
+
+Database = Union[SyncDB, AsyncDB]
+
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDB(session)
+        return
     db = SessionLocal()
     try:
-        yield db
+        yield SyncDB(db)
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
 
 # --- Эндпоинты для постов через БД ---
 from fastapi import Depends
 
+# --- Лента: один запрос на страницу ---
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 200
+
+def encode_cursor(timestamp: datetime, post_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{post_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        timestamp, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), post_id
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
+
+def fetch_feed(
+    db: Session,
+    current_user_id: Optional[str],
+    owner_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = FEED_PAGE_SIZE,
+) -> List[Post]:
+    """Страница ленты (новые сверху) одним SQL-запросом.
+
+    Посты после курсора выбираются по индексу (timestamp, id) вместе с
+    автором и денормализованным счётчиком лайков; liked_by_me — EXISTS по
+    уникальному индексу (user_id, post_id). Без current_user_id liked_by_me
+    всегда False — это общая для всех часть ленты, которую кэшируем.
+    """
+    if current_user_id is None:
+        liked_by_me = literal(False)
+    else:
+        liked_by_me = exists().where(LikeDB.post_id == PostDB.id, LikeDB.user_id == current_user_id)
+    query = (
+        select(
+            PostDB.id, PostDB.text, PostDB.timestamp, PostDB.owner_id,
+            func.coalesce(UserDB.username, ""),
+            PostDB.like_count,
+            liked_by_me,
+        )
+        .outerjoin(UserDB, UserDB.id == PostDB.owner_id)
+    )
+    if owner_id is not None:
+        query = query.where(PostDB.owner_id == owner_id)
+    if cursor:
+        before_ts, before_id = decode_cursor(cursor)
+        query = query.where(
+            (PostDB.timestamp < before_ts) | ((PostDB.timestamp == before_ts) & (PostDB.id < before_id))
+        )
+    rows = db.execute(query.order_by(PostDB.timestamp.desc(), PostDB.id.desc()).limit(limit)).all()
+    return [
+        Post(
+            id=post_id,
+            text=text,
+            timestamp=timestamp,
+            owner_id=post_owner_id,
+            owner_username=username,
+            likes=likes,
+            liked_by_me=bool(liked),
+        )
+        for post_id, text, timestamp, post_owner_id, username, likes, liked in rows
+    ]
+
+# --- Кэш ленты ---
+FEED_CACHE = FeedCache(maxsize=int(os.getenv("FEED_CACHE_SIZE", "512")))
+USER_LIKES = UserLikesCache()
+
+def build_feed_page(db: Session, owner_id: Optional[str], cursor: Optional[str], limit: int) -> FeedPage:
+    posts = fetch_feed(db, None, owner_id=owner_id, cursor=cursor, limit=limit)
+    next_cursor = encode_cursor(posts[-1].timestamp, posts[-1].id) if len(posts) == limit else None
+    with span("serialize"):
+        return FeedPage.from_json(
+            [post.id for post in posts],
+            (post.model_dump_json(exclude={"liked_by_me"}).encode() for post in posts),
+            next_cursor,
+        )
+
+def serve_feed(
+    db: Session, request: Request, user_id: str, owner_id: Optional[str], cursor: Optional[str], limit: int
+) -> Response:
+    """Отдаёт страницу ленты из кэша, накладывая liked_by_me текущего пользователя.
+
+    Если клиент прислал If-None-Match с тем же ETag, тело не отправляется (304).
+    """
+    page = FEED_CACHE.get_or_build(
+        (owner_id, cursor, limit), lambda: build_feed_page(db, owner_id, cursor, limit)
+    )
+    liked = USER_LIKES.get(
+        user_id, lambda: db.execute(select(LikeDB.post_id).where(LikeDB.user_id == user_id)).scalars()
+    )
+    with span("serialize"):
+        body = page.render(liked)
+    headers = {"ETag": etag_for(body)}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/posts", response_model=List[Post])
-def list_posts(
-    db: Session = Depends(get_db),
-    current_user: Annotated[User, Depends(get_current_user)] = Depends()
+async def list_posts(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Database = Depends(get_db),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor из предыдущей страницы"),
+):
+    if cursor:
+        decode_cursor(cursor)  # неверный курсор — 400, а не запись в кэш
+    return await db.run(serve_feed, request, current_user.id, None, cursor, limit)
+
+# --- Полнотекстовый поиск ---
+SEARCH_SQL = """
+SELECT p.id, p.text, p.timestamp, p.owner_id, COALESCE(u.username, ''), p.like_count,
+       EXISTS (SELECT 1 FROM likes l WHERE l.post_id = p.id AND l.user_id = :user_id),
+       f.rank, f.rowid
+FROM (
+    -- сортируем и режем страницу по одному posts_fts: иначе каждое совпадение
+    -- ищется в posts через ix_posts_search_id ещё до ORDER BY
+    SELECT f.rowid, f.rank FROM posts_fts f
+    WHERE posts_fts MATCH :match {keyset}
+    ORDER BY f.rank, f.rowid
+    LIMIT :limit
+) f
+JOIN posts p ON p.search_id = f.rowid
+LEFT JOIN users u ON u.id = p.owner_id
+ORDER BY f.rank, f.rowid
+"""
+
+def fts_match_query(q: str) -> str:
+    """Каждое слово запроса — отдельная фраза в кавычках: синтаксис FTS5 из ввода не исполняется."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+def search_posts(
+    db: Session, current_user_id: str, q: str, cursor: Optional[str], limit: int
+) -> Tuple[List[Post], Optional[str]]:
+    """Посты по релевантности (bm25), keyset-пагинация по (rank, rowid), один запрос."""
+    params = {"match": fts_match_query(q), "user_id": current_user_id, "limit": limit}
+    keyset = ""
+    if cursor:
+        try:
+            rank, rowid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            params["rank"], params["rowid"] = float(rank), int(rowid)
+        except ValueError:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
+        keyset = "AND (f.rank > :rank OR (f.rank = :rank AND f.rowid > :rowid))"
+    rows = db.execute(text(SEARCH_SQL.format(keyset=keyset)), params).all()
+    posts = [
+        Post(
+            id=post_id,
+            text=post_text,
+            timestamp=timestamp,
+            owner_id=owner_id,
+            owner_username=username,
+            likes=likes,
+            liked_by_me=bool(liked),
+        )
+        for post_id, post_text, timestamp, owner_id, username, likes, liked, _, _ in rows
+    ]
+    next_cursor = None
+    if len(rows) == limit:
+        rank, rowid = rows[-1][-2:]
+        next_cursor = base64.urlsafe_b64encode(f"{rank!r}|{rowid}".encode()).decode()
+    return posts, next_cursor
+
+@app.get("/api/posts/search", response_model=List[Post])
+async def search(
+    response: Response,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Database = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor из предыдущей страницы"),
 ):
-    posts = db.query(PostDB).order_by(PostDB.timestamp.desc()).all()
-    result = []
-    for post in posts:
-        likes_count = db.query(LikeDB).filter_by(post_id=post.id).count()
-        liked_by_me = db.query(LikeDB).filter_by(post_id=post.id, user_id=current_user.id).first() is not None
-        result.append(Post(
-            id=post.id,
-            text=post.text,
-            timestamp=post.timestamp,
-            owner_id=post.owner_id,
-            owner_username=post.owner.username if post.owner else "",
-            likes=likes_count,
-            liked_by_me=liked_by_me
-        ))
-    return result
+    if not q.split():
+        return []
+    posts, next_cursor = await db.run(search_posts, current_user.id, q, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return posts
 
 @app.post("/api/posts", response_model=Post, status_code=201)
-def create_post(
+async def create_post(
     post_data: PostCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Session = Depends(get_db)
+    db: Database = Depends(get_db)
 ):
+    post = await db.run(insert_post, current_user, post_data.text)
+    FEED_CACHE.post_created(current_user.id)
+    return post
+
+def insert_post(db: Session, current_user: User, text: str) -> Post:
     # Убедимся, что пользователь есть в БД (создадим, если нет)
     user = db.query(UserDB).filter(UserDB.id == current_user.id).first()
     if not user:
@@ -153,7 +326,7 @@ def create_post(
 
     new_post = PostDB(
         id=str(uuid.uuid4()),
-        text=post_data.text,
+        text=text,
         timestamp=datetime.now(timezone.utc),
         owner_id=user.id
     )
@@ -169,72 +342,87 @@ def create_post(
     )
 
 @app.delete("/api/posts/{post_id}", status_code=204)
-def delete_post(
+async def delete_post(
     post_id: str,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Session = Depends(get_db)
+    db: Database = Depends(get_db)
 ):
+    await db.run(delete_own_post, post_id, current_user.id)
+    FEED_CACHE.post_changed(post_id)
+    return
+
+def delete_own_post(db: Session, post_id: str, user_id: str) -> None:
     post = db.query(PostDB).filter(PostDB.id == post_id).first()
     if not post:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Post not found")
-    if post.owner_id != current_user.id:
+    if post.owner_id != user_id:
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to delete this post")
     db.delete(post)
     db.commit()
-    return
 
 @app.post("/api/posts/{post_id}/like", status_code=201)
-def like_post(
-    post_id: str = Path(...),
-    current_user: Annotated[User, Depends(get_current_user)] = Depends(),
-    db: Session = Depends(get_db)
+async def like_post(
+    post_id: Annotated[str, Path()],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Database = Depends(get_db)
 ):
-    post = db.query(PostDB).filter(PostDB.id == post_id).first()
-    if not post:
+    if not await db.run(add_like, current_user.id, post_id):
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Post not found")
-    # Проверяем, есть ли уже лайк
-    like = db.query(LikeDB).filter_by(user_id=current_user.id, post_id=post_id).first()
-    if like:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Already liked")
-    new_like = LikeDB(user_id=current_user.id, post_id=post_id)
-    db.add(new_like)
-    db.commit()
+    USER_LIKES.update(current_user.id, post_id, liked=True)
+    FEED_CACHE.post_changed(post_id)
     return {"detail": "Liked"}
 
 @app.delete("/api/posts/{post_id}/like", status_code=204)
-def unlike_post(
-    post_id: str = Path(...),
-    current_user: Annotated[User, Depends(get_current_user)] = Depends(),
-    db: Session = Depends(get_db)
+async def unlike_post(
+    post_id: Annotated[str, Path()],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Database = Depends(get_db)
 ):
-    like = db.query(LikeDB).filter_by(user_id=current_user.id, post_id=post_id).first()
-    if not like:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Like not found")
-    db.delete(like)
-    db.commit()
+    await db.run(remove_like, current_user.id, post_id)
+    USER_LIKES.update(current_user.id, post_id, liked=False)
+    FEED_CACHE.post_changed(post_id)
     return
 
+def add_like(db: Session, user_id: str, post_id: str) -> bool:
+    """Идемпотентный лайк одним INSERT ... ON CONFLICT DO NOTHING.
+
+    Возвращает False, только если поста нет. Повторный лайк — не ошибка.
+    """
+    result = db.execute(
+        sqlite_insert(LikeDB)
+        .from_select(
+            ["id", "user_id", "post_id"],
+            select(literal(str(uuid.uuid4())), literal(user_id), literal(post_id))
+            .where(exists().where(PostDB.id == post_id)),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+    )
+    db.commit()
+    if result.rowcount:
+        return True
+    # Ничего не вставлено: либо лайк уже был, либо поста нет — редкий путь
+    return db.query(exists().where(PostDB.id == post_id)).scalar()
+
+def remove_like(db: Session, user_id: str, post_id: str) -> None:
+    """Идемпотентное снятие лайка одним DELETE; счётчик уменьшает триггер."""
+    db.execute(delete(LikeDB).where(LikeDB.user_id == user_id, LikeDB.post_id == post_id))
+    db.commit()
+
 @app.get("/api/users/{username}/posts", response_model=List[Post])
-def get_user_posts(
+async def get_user_posts(
     username: str,
-    db: Session = Depends(get_db),
-    current_user: Annotated[User, Depends(get_current_user)] = Depends()
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Database = Depends(get_db),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor из предыдущей страницы"),
 ):
-    user = db.query(UserDB).filter(UserDB.username == username).first()
-    if not user:
+    user_id = await db.run(find_user_id, username)
+    if not user_id:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-    posts = db.query(PostDB).filter(PostDB.owner_id == user.id).order_by(PostDB.timestamp.desc()).all()
-    result = []
-    for post in posts:
-        likes_count = db.query(LikeDB).filter_by(post_id=post.id).count()
-        liked_by_me = db.query(LikeDB).filter_by(post_id=post.id, user_id=current_user.id).first() is not None
-        result.append(Post(
-            id=post.id,
-            text=post.text,
-            timestamp=post.timestamp,
-            owner_id=post.owner_id,
-            owner_username=user.username,
-            likes=likes_count,
-            liked_by_me=liked_by_me
-        ))
-    return result
\ No newline at end of file
+    if cursor:
+        decode_cursor(cursor)
+    return await db.run(serve_feed, request, current_user.id, user_id, cursor, limit)
+
+def find_user_id(db: Session, username: str) -> Optional[str]:
+    return db.execute(select(UserDB.id).where(UserDB.username == username)).scalar()
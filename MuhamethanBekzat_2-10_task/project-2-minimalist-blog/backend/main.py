@@ -2,9 +2,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
+import request_metrics
 
 # --- Конфигурация приложения ---
 app = FastAPI()
+request_metrics.install(app)
 
 # --- Настройка CORS ---
 origins = [
@@ -3,11 +3,14 @@ import httpx # Библиотека для асинхронных HTTP запр
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv # Для загрузки переменных из .env файла
+import request_metrics
+from request_metrics import span
 
 # Загружаем переменные окружения из .env файла
 load_dotenv()
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- Настройка CORS ---
 origins = ["http://localhost:3000"]
@@ -38,7 +41,8 @@ async def get_forecast(city: str):
     }
 
     async with httpx.AsyncClient() as client:
-        response = await client.get(FORECAST_BASE_URL, params=params)
+        with span("upstream"):
+            response = await client.get(FORECAST_BASE_URL, params=params)
 
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="Город не найден")
@@ -77,7 +81,8 @@ async def get_weather_by_coords(
     }
 
     async with httpx.AsyncClient() as client:
-        response = await client.get(WEATHER_BASE_URL, params=params)
+        with span("upstream"):
+            response = await client.get(WEATHER_BASE_URL, params=params)
 
     if response.status_code != 200:
         error_detail = response.json().get("message", "Ошибка получения погоды")
@@ -5,8 +5,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, HttpUrl
 from typing import Optional
 from datetime import datetime, timedelta
+import request_metrics
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- Настройка CORS ---
 origins = ["http://localhost:3000"]
@@ -4,8 +4,11 @@ from pydantic import BaseModel
 from typing import Dict
 import json
 import os
+import request_metrics
+from request_metrics import timed
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- Настройка CORS ---
 origins = ["http://localhost:3000"]
@@ -34,6 +37,7 @@ else:
         }
     }
 
+@timed("io")
 def save_data():
     with open(DATA_FILE, "w", encoding="utf-8") as f:
         json.dump(poll_data, f, ensure_ascii=False, indent=2)
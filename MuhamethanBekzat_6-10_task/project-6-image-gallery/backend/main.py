@@ -5,8 +5,11 @@ from fastapi import FastAPI, UploadFile, File, HTTPException, Path
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
+import request_metrics
+from request_metrics import span
 
 app = FastAPI()
+request_metrics.install(app)
 
 MAX_SIZE_MB = 5
 MAX_SIZE_BYTES = MAX_SIZE_MB * 1024 * 1024
@@ -47,9 +50,10 @@ async def upload_image(file: UploadFile = File(...)):
     # Асинхронно сохраняем файл
     try:
         from aiofiles.threadpool.binary import AsyncBufferedIOBase  # type: ignore
-        async with aiofiles.open(file_path, mode='wb') as out_file:  # type: ignore
-            out_file: AsyncBufferedIOBase
-            await out_file.write(content)
+        with span("io"):
+            async with aiofiles.open(file_path, mode='wb') as out_file:  # type: ignore
+                out_file: AsyncBufferedIOBase
+                await out_file.write(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving file: {e}")
 
@@ -64,7 +68,8 @@ async def delete_image(filename: str = Path(...)):
     if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="Файл не найден")
     try:
-        os.remove(file_path)
+        with span("io"):
+            os.remove(file_path)
         return {"detail": "Файл успешно удалён"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении файла: {e}")
@@ -73,9 +78,10 @@ async def delete_image(filename: str = Path(...)):
 async def get_images():
     """Возвращает список URL всех загруженных изображений."""
     try:
-        images = os.listdir(IMAGE_DIR)
-        # Фильтруем, чтобы случайно не отдать не-файлы
-        image_urls = [f"/static/images/{img}" for img in images if os.path.isfile(os.path.join(IMAGE_DIR, img))]
+        with span("io"):
+            images = os.listdir(IMAGE_DIR)
+            # Фильтруем, чтобы случайно не отдать не-файлы
+            image_urls = [f"/static/images/{img}" for img in images if os.path.isfile(os.path.join(IMAGE_DIR, img))]
         return image_urls
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading image directory: {e}")
\ No newline at end of file
@@ -7,8 +7,11 @@ from pydantic import BaseModel
 from typing import List
 import aiofiles
 import os
+import request_metrics
+from request_metrics import timed
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- CORS ---
 origins = ["http://localhost:3000"]
@@ -38,6 +41,7 @@ class EntryUpdate(BaseModel):
     message: str
 
 # --- Вспомогательные функции для работы с файлом ---
+@timed("io")
 async def read_db() -> List[GuestbookEntry]:
     async with aiofiles.open(DB_FILE, mode='r', encoding='utf-8') as f:
         content = await f.read()
@@ -46,6 +50,7 @@ async def read_db() -> List[GuestbookEntry]:
         data = json.loads(content)
         return [GuestbookEntry(**item) for item in data]
 
+@timed("io")
 async def write_db(data: List[GuestbookEntry]):
     # Преобразуем объекты Pydantic в словари для сериализации в JSON
     export_data = [item.model_dump(mode='json') for item in data]
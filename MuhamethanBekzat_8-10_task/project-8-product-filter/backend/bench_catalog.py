@@ -0,0 +1,100 @@
+"""Бенчмарк фильтрации каталога: списковые включения по словарям против колоночной маски.
+
+Запуск: python bench_catalog.py [размер ...]   (по умолчанию 1000000 10000000)
+Наивный вариант на словарях и триграммный поиск запускаются только до
+NAIVE_LIMIT товаров — на 10M словарей и списков триграмм не хватит памяти
+обычной машины.
+"""
+import sys
+import time
+
+import numpy as np
+
+from catalog import ProductCatalog
+
+CATEGORIES = ["Электроника", "Одежда", "Книги", "Дом", "Спорт", "Игрушки", "Красота", "Авто"]
+NAIVE_LIMIT = 2_000_000
+REPEAT = 5
+
+
+def make_catalog(n: int, seed: int = 0) -> ProductCatalog:
+    rng = np.random.default_rng(seed)
+    return ProductCatalog(
+        ids=np.arange(1, n + 1, dtype=np.int64),
+        names=[f"Товар {i}" for i in range(n)],
+        category_codes=rng.integers(0, len(CATEGORIES), n, dtype=np.int32),
+        categories=CATEGORIES,
+        prices=rng.integers(1, 2000, n).astype(np.float64),
+        search_index=False,
+    )
+
+
+def naive_filter(db, category, min_price, max_price):
+    result = db
+    if category:
+        result = [p for p in result if p["category"].lower() == category.lower()]
+    if min_price is not None:
+        result = [p for p in result if p["price"] >= min_price]
+    if max_price is not None:
+        result = [p for p in result if p["price"] <= max_price]
+    return result
+
+
+def naive_search_sorted(db, search):
+    result = [p for p in db if search.lower() in p["name"].lower()]
+    return sorted(result, key=lambda p: p["price"])
+
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(n: int) -> None:
+    start = time.perf_counter()
+    catalog = make_catalog(n)
+    print(f"\n== {n:,} товаров (генерация {time.perf_counter() - start:.2f} с) ==")
+
+    db = catalog.rows(np.arange(n)) if n <= NAIVE_LIMIT else None
+    cases = [("Книги", None, None), (None, 100, 500), ("Электроника", 100, 500)]
+    for category, min_price, max_price in cases:
+        label = f"category={category} price=[{min_price}, {max_price}]"
+        t_mask = best_of(lambda: np.flatnonzero(catalog.mask(category, min_price, max_price)))
+        line = f"{label:<45} маска {t_mask * 1000:8.2f} мс"
+        if db is not None:
+            t_naive = best_of(lambda: naive_filter(db, category, min_price, max_price))
+            line += f" | словари {t_naive * 1000:9.2f} мс | x{t_naive / t_mask:.0f}"
+        print(line)
+
+    t_sort = best_of(lambda: catalog.query(category="Книги", sort="price_asc"))
+    print(f"{'category=Книги sort=price_asc':<45} перестановка {t_sort * 1000:8.2f} мс")
+
+    filters = catalog.filters(min_price=100, max_price=500)
+    t_facets = best_of(lambda: catalog.facets(filters))
+    print(f"{'фасеты (категории + гистограмма цен)':<45} {t_facets * 1000:8.2f} мс")
+
+    if db is not None:
+        start = time.perf_counter()
+        catalog.build_search_index()
+        print(f"{'построение триграммного индекса':<45} {time.perf_counter() - start:8.2f} с")
+        for search in ["товар 12345", "ар 9", "т", "1"]:
+            t_index = best_of(lambda: catalog.query(search=search, sort="price_asc"))
+            t_naive = best_of(lambda: naive_search_sorted(db, search))
+            print(
+                f"{'search=' + repr(search) + ' sort=price_asc':<45} индекс {t_index * 1000:8.2f} мс"
+                f" | словари {t_naive * 1000:9.2f} мс | x{t_naive / t_index:.0f}"
+            )
+
+    page = np.flatnonzero(catalog.mask("Книги", 100, 500))[:50]
+    t_page = best_of(lambda: catalog.rows(page))
+    print(f"{'сборка страницы из 50 товаров':<45} {t_page * 1e6:8.1f} мкс")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,297 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+NGRAM = 3
+# Кандидатов из триграммного индекса не больше этого — проверяем их по одному,
+# иначе дешевле векторный проход по всем названиям
+VERIFY_LIMIT = 1000
+
+
+class ProductCatalog:
+    """Каталог товаров в колоночном виде.
+
+    Цены и id хранятся в массивах NumPy, категории — словарным кодированием
+    (массив кодов + список названий). Фильтры по категории и цене считаются
+    одной векторизованной булевой маской, а словари товаров собираются только
+    для тех строк, которые реально уходят в ответ.
+
+    Индексы строятся один раз, при создании каталога: списки строк по каждой
+    категории, перестановки по возрастанию/убыванию цены и триграммный индекс
+    по названиям в casefold (search_index=False — без него, поиск тогда
+    недоступен до явного build_search_index()). Запросы короче триграммы и
+    запросы из частых триграмм проверяются векторно, по массиву кодов символов
+    всех названий.
+    """
+
+    def __init__(
+        self,
+        ids,
+        names: List[str],
+        category_codes,
+        categories: List[str],
+        prices,
+        search_index: bool = True,
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = names
+        self.category_codes = np.asarray(category_codes, dtype=np.int32)
+        self.categories = categories
+        self.prices = np.asarray(prices, dtype=np.float64)
+        # Ключ — название категории в нижнем регистре, значение — её код
+        self._category_lookup: Dict[str, int] = {c.lower(): code for code, c in enumerate(categories)}
+        self.sorted_categories: List[str] = sorted(set(categories))
+        self._codes_by_name: Dict[str, int] = {c: code for code, c in enumerate(categories)}
+        self.category_postings: List[np.ndarray] = [
+            np.flatnonzero(self.category_codes == code) for code in range(len(categories))
+        ]
+        # Стабильные перестановки: при равной цене сохраняется исходный порядок
+        self.price_order = np.argsort(self.prices, kind="stable")
+        self.price_order_desc = np.argsort(-self.prices, kind="stable")
+        # Позиция каждой строки в перестановке — ключ курсора для пагинации
+        self.price_rank = np.empty(len(self.prices), dtype=np.int64)
+        self.price_rank[self.price_order] = np.arange(len(self.prices))
+        self.price_rank_desc = np.empty(len(self.prices), dtype=np.int64)
+        self.price_rank_desc[self.price_order_desc] = np.arange(len(self.prices))
+        self.price_range: Tuple[float, float] = (
+            (float(self.prices.min()), float(self.prices.max())) if len(self.prices) else (0.0, 0.0)
+        )
+        self._folded_names: Optional[List[str]] = None
+        self._ngram_index: Optional[Dict[str, np.ndarray]] = None
+        self._name_codes: Optional[np.ndarray] = None
+        self._name_starts: Optional[np.ndarray] = None
+        self._char_counts: Optional[np.ndarray] = None
+        if search_index:
+            self.build_search_index()
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "ProductCatalog":
+        categories: List[str] = []
+        codes: Dict[str, int] = {}
+        category_codes = np.empty(len(records), dtype=np.int32)
+        for i, p in enumerate(records):
+            code = codes.get(p["category"])
+            if code is None:
+                code = codes[p["category"]] = len(categories)
+                categories.append(p["category"])
+            category_codes[i] = code
+        return cls(
+            ids=[p["id"] for p in records],
+            names=[p["name"] for p in records],
+            category_codes=category_codes,
+            categories=categories,
+            prices=[p["price"] for p in records],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def category_code(self, category: str) -> Optional[int]:
+        """Код категории без учёта регистра или None, если такой категории нет."""
+        return self._category_lookup.get(category.lower())
+
+    def category_mask(self, category: Optional[str]) -> Optional[np.ndarray]:
+        """Маска строк категории (None — фильтра нет)."""
+        if not category or category.lower() == "all":
+            return None
+        mask = np.zeros(len(self), dtype=bool)
+        code = self.category_code(category)
+        if code is not None:
+            mask[self.category_postings[code]] = True
+        return mask
+
+    def price_mask(self, min_price: Optional[float], max_price: Optional[float]) -> Optional[np.ndarray]:
+        """Маска строк в диапазоне цен (None — фильтра нет)."""
+        if min_price is None and max_price is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        return mask
+
+    def mask(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> np.ndarray:
+        """Булева маска строк, проходящих фильтры по категории и диапазону цен."""
+        return self.combine(self.category_mask(category), self.price_mask(min_price, max_price))
+
+    def combine(self, *masks: Optional[np.ndarray]) -> np.ndarray:
+        """Пересечение масок; None означает «фильтра нет»."""
+        result = np.ones(len(self), dtype=bool)
+        for mask in masks:
+            if mask is not None:
+                result &= mask
+        return result
+
+    def build_search_index(self) -> None:
+        """Строит триграммный индекс: триграмма -> отсортированный массив строк."""
+        folded = [name.casefold() for name in self.names]
+        postings: Dict[str, List[int]] = {}
+        for i, name in enumerate(folded):
+            for gram in {name[k:k + NGRAM] for k in range(len(name) - NGRAM + 1)}:
+                postings.setdefault(gram, []).append(i)
+        self._folded_names = folded
+        self._ngram_index = {gram: np.array(rows, dtype=np.int64) for gram, rows in postings.items()}
+        # Все названия подряд через "\0" как коды символов, и начало каждого названия
+        codes = np.frombuffer("\0".join(folded).encode("utf-32-le"), dtype=np.uint32)
+        if len(codes) and codes.max() < 1 << 16:
+            codes = codes.astype(np.uint16)
+        lengths = np.fromiter(map(len, folded), dtype=np.int64, count=len(folded))
+        self._name_codes = codes
+        self._name_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+        self._char_counts = np.bincount(codes)
+
+    def scan_mask(self, needle: str) -> np.ndarray:
+        """Маска строк, в сложенном названии которых есть needle, — векторно, без цикла по названиям."""
+        mask = np.zeros(len(self), dtype=bool)
+        chars = [ord(c) for c in needle]
+        counts = self._char_counts
+        if not chars or any(c >= len(counts) or counts[c] == 0 for c in chars):
+            return mask
+        codes = self._name_codes
+        last = len(codes) - len(chars)
+        # Начинаем с самого редкого символа запроса и сужаем позиции сверкой остальных
+        rare = min(range(len(chars)), key=lambda k: counts[chars[k]])
+        positions = np.flatnonzero(codes == chars[rare]) - rare
+        positions = positions[(positions >= 0) & (positions <= last)]
+        for k, c in enumerate(chars):
+            if k != rare and len(positions):
+                positions = positions[codes[positions + k] == c]
+        mask[np.searchsorted(self._name_starts, positions, side="right") - 1] = True
+        return mask
+
+    def search_mask(self, search: str) -> np.ndarray:
+        """Маска строк, в названии которых есть подстрока search (без учёта регистра)."""
+        if self._ngram_index is None:
+            raise RuntimeError("триграммный индекс не построен: вызовите build_search_index()")
+        needle = search.casefold()
+        names = self._folded_names
+        mask = np.zeros(len(self), dtype=bool)
+        if "\0" in needle:
+            # "\0" разделяет названия в массиве кодов — такой запрос нигде не совпадёт
+            return mask
+        if len(needle) < NGRAM:
+            # Слишком короткий запрос для триграмм
+            return self.scan_mask(needle)
+        grams = {needle[k:k + NGRAM] for k in range(len(needle) - NGRAM + 1)}
+        lists = []
+        for gram in grams:
+            rows = self._ngram_index.get(gram)
+            if rows is None:
+                return mask
+            lists.append(rows)
+        # Пересекаем от самого короткого списка; длинные списки (частые
+        # триграммы) пересекать дороже, чем просто проверить кандидатов
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            if len(rows) > 8 * len(candidates):
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                return mask
+        if len(candidates) > VERIFY_LIMIT:
+            return self.scan_mask(needle)
+        mask[[i for i in candidates.tolist() if needle in names[i]]] = True
+        return mask
+
+    def filters(
+        self,
+        search: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Tuple[Optional[np.ndarray], ...]:
+        """Маски отдельных фильтров: (категория, цена, поиск); None — фильтра нет."""
+        return (
+            self.category_mask(category),
+            self.price_mask(min_price, max_price),
+            self.search_mask(search) if search else None,
+        )
+
+    def query(
+        self,
+        search: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: Optional[str] = None,
+    ) -> np.ndarray:
+        """Индексы подходящих товаров в нужном порядке."""
+        return self.ordered(self.combine(*self.filters(search, category, min_price, max_price)), sort)
+
+    def ordered(self, mask: np.ndarray, sort: Optional[str] = None) -> np.ndarray:
+        """Индексы строк маски; отсортированный результат — один проход маски по готовой перестановке."""
+        if sort == "price_asc":
+            return self.price_order[mask[self.price_order]]
+        if sort == "price_desc":
+            return self.price_order_desc[mask[self.price_order_desc]]
+        return np.flatnonzero(mask)
+
+    def page(
+        self,
+        indices: np.ndarray,
+        sort: Optional[str] = None,
+        cursor: Optional[int] = None,
+        limit: int = 20,
+    ) -> Tuple[np.ndarray, Optional[int]]:
+        """Страница из упорядоченных индексов после строки cursor и курсор следующей страницы.
+
+        Курсор — номер строки каталога, а не смещение: позиция ищется бинарным
+        поиском по рангу строки в текущем порядке, поэтому страница не
+        «съезжает», даже если строка-курсор выпала из фильтра.
+        """
+        start = 0
+        if cursor is not None:
+            if sort == "price_asc":
+                rank = self.price_rank
+            elif sort == "price_desc":
+                rank = self.price_rank_desc
+            else:
+                rank = None
+            if rank is None:
+                start = int(np.searchsorted(indices, cursor, side="right"))
+            else:
+                start = int(np.searchsorted(rank[indices], rank[cursor], side="right"))
+        page = indices[start:start + limit]
+        next_cursor = int(page[-1]) if start + limit < len(indices) else None
+        return page, next_cursor
+
+    def facets(
+        self, filters: Tuple[Optional[np.ndarray], ...], bins: int = 10
+    ) -> Tuple[Dict[str, int], List[Tuple[float, float, int]]]:
+        """Счётчики по категориям и гистограмма цен для масок из filters().
+
+        Каждый фасет не учитывает собственный фильтр (категории считаются без
+        фильтра по категории, гистограмма — без диапазона цен), чтобы UI мог
+        показать, сколько товаров даст другой выбор. Оба фасета считаются
+        векторно: bincount по кодам категорий и histogram по ценам.
+        """
+        by_category, by_price, by_search = filters
+
+        counts = np.bincount(
+            self.category_codes[self.combine(by_price, by_search)], minlength=len(self.categories)
+        )
+        category_counts = {name: int(counts[self._codes_by_name[name]]) for name in self.sorted_categories}
+
+        hist, edges = np.histogram(
+            self.prices[self.combine(by_category, by_search)], bins=bins, range=self.price_range
+        )
+        histogram = [(float(edges[k]), float(edges[k + 1]), int(hist[k])) for k in range(len(hist))]
+        return category_counts, histogram
+
+    def rows(self, indices) -> List[dict]:
+        """Собирает словари товаров только для переданных индексов."""
+        ids = self.ids[indices].tolist()
+        prices = self.prices[indices].tolist()
+        codes = self.category_codes[indices].tolist()
+        names = self.names
+        categories = self.categories
+        return [
+            {"id": ids[k], "name": names[i], "category": categories[codes[k]], "price": prices[k]}
+            for k, i in enumerate(np.asarray(indices).tolist())
+        ]
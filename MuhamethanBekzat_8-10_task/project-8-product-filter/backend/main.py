@@ -1,9 +1,14 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
+from catalog import ProductCatalog
+from query_cache import ResponseCache, normalize_query
+import request_metrics
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- CORS ---
 origins = ["http://localhost:3000"]
@@ -21,6 +26,17 @@ PRODUCTS_DB = [
     {"id": 8, "name": "Умные часы Chronos", "category": "Электроника", "price": 300},
     {"id": 9, "name": "Худи 'Логотип'", "category": "Одежда", "price": 60},
 ]
+CATALOG = ProductCatalog.from_records(PRODUCTS_DB)
+# Версия каталога увеличивается при каждом изменении товаров и входит в ключ кэша
+CATALOG_VERSION = 0
+RESPONSE_CACHE = ResponseCache(maxsize=1024)
+
+def invalidate_catalog():
+    """Вызывать после любого изменения PRODUCTS_DB: пересобирает каталог, поднимает версию и сбрасывает кэш."""
+    global CATALOG, CATALOG_VERSION
+    CATALOG = ProductCatalog.from_records(PRODUCTS_DB)
+    CATALOG_VERSION += 1
+    RESPONSE_CACHE.invalidate()
 
 # --- Pydantic модели ---
 class Product(BaseModel):
@@ -29,44 +45,77 @@ class Product(BaseModel):
     category: str
     price: float
 
+class CategoryCount(BaseModel):
+    category: str
+    count: int
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    total: int
+    next_cursor: Optional[str] = None
+    categories: List[CategoryCount]
+    price_histogram: List[PriceBucket]
+
 # --- Эндпоинты API ---
-@app.get("/api/products", response_model=List[Product])
+@app.get("/api/products", response_model=ProductPage)
 async def filter_products(
     search: Optional[str] = None,
     category: Optional[str] = None,
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
-    sort: Optional[str] = Query(None, description="price_asc или price_desc")
+    sort: Optional[str] = Query(None, description="price_asc или price_desc"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    bins: int = Query(10, ge=1, le=50, description="Число столбцов гистограммы цен"),
 ):
-    """Фильтрует продукты по поиску, категории, диапазону цен и сортирует по цене."""
-    filtered_products = PRODUCTS_DB
-
-    # Фильтрация по категории
-    if category and category.lower() != "all":
-        filtered_products = [p for p in filtered_products if p["category"].lower() == category.lower()]
-
-    # Фильтрация по поисковому запросу
-    if search:
-        filtered_products = [p for p in filtered_products if search.lower() in p["name"].lower()]
+    """Фильтрует продукты, сортирует по цене и возвращает страницу вместе с фасетами.
 
-    # Фильтрация по минимальной цене
-    if min_price is not None:
-        filtered_products = [p for p in filtered_products if p["price"] >= min_price]
+    Ответ берётся из кэша готовых байтов по нормализованному запросу, поэтому
+    попадание в кэш не проходит ни фильтрацию, ни валидацию Pydantic и
+    отдаётся прямо из event loop.
+    """
+    after = None
+    if cursor is not None:
+        # Одного isdigit() мало: он пропускает "²" и не-ASCII цифры, на "²" int() падает с 500
+        if not (cursor.isascii() and cursor.isdigit()) or int(cursor) >= len(CATALOG):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        after = int(cursor)
 
-    # Фильтрация по максимальной цене
-    if max_price is not None:
-        filtered_products = [p for p in filtered_products if p["price"] <= max_price]
+    query = normalize_query(search, category, min_price, max_price, sort, limit, after, bins)
+    key, catalog = (CATALOG_VERSION, query), CATALOG
+    body = RESPONSE_CACHE.get(key)
+    if body is None:
+        # Промах (фильтры, фасеты, сериализация) — в пуле потоков: на большом
+        # каталоге это десятки миллисекунд, а NumPy на это время отпускает GIL
+        body = await run_in_threadpool(
+            RESPONSE_CACHE.get_or_compute, key, lambda: build_product_page(catalog, *query)
+        )
+    return Response(content=body, media_type="application/json")
 
-    # Сортировка по цене
-    if sort == "price_asc":
-        filtered_products = sorted(filtered_products, key=lambda p: p["price"])
-    elif sort == "price_desc":
-        filtered_products = sorted(filtered_products, key=lambda p: p["price"], reverse=True)
+def build_product_page(catalog, search, category, min_price, max_price, sort, limit, cursor, bins) -> dict:
+    filters = catalog.filters(search=search, category=category, min_price=min_price, max_price=max_price)
+    indices = catalog.ordered(catalog.combine(*filters), sort)
+    page, next_cursor = catalog.page(indices, sort=sort, cursor=cursor, limit=limit)
+    category_counts, histogram = catalog.facets(filters, bins=bins)
+    return {
+        "items": catalog.rows(page),
+        "total": len(indices),
+        "next_cursor": str(next_cursor) if next_cursor is not None else None,
+        "categories": [{"category": name, "count": count} for name, count in category_counts.items()],
+        "price_histogram": [{"min": lo, "max": hi, "count": count} for lo, hi, count in histogram],
+    }
 
-    return filtered_products
+@app.get("/api/metrics/cache")
+async def get_cache_metrics():
+    """Статистика кэша ответов: попадания, промахи, hit ratio и сэкономленное время."""
+    return {"catalog_version": CATALOG_VERSION, **RESPONSE_CACHE.stats()}
 
 @app.get("/api/categories", response_model=List[str])
 async def get_categories():
     """Возвращает список уникальных категорий."""
-    categories = sorted(list(set(p["category"] for p in PRODUCTS_DB)))
-    return categories
\ No newline at end of file
+    return CATALOG.sorted_categories
\ No newline at end of file
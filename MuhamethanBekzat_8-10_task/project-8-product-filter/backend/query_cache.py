@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable, Optional
+
+from request_metrics import span
+
+try:
+    import orjson
+
+    def dumps(data) -> bytes:
+        return orjson.dumps(data)
+except ImportError:  # orjson не обязателен — json из стандартной библиотеки тоже подойдёт
+    import json
+
+    def dumps(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def normalize_query(
+    search: Optional[str],
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    sort: Optional[str],
+    limit: int,
+    cursor: Optional[int],
+    bins: int,
+) -> tuple:
+    """Приводит параметры фильтра к каноническому виду для ключа кэша.
+
+    Запросы, которые дают одинаковый ответ («Книги» и «книги», пустой поиск и
+    его отсутствие, category=All и без категории, 100 и 100.0), получают
+    одинаковый ключ.
+    """
+    search = search.casefold() if search else ""
+    category = category.lower() if category and category.lower() != "all" else ""
+    sort = sort if sort in ("price_asc", "price_desc") else ""
+    return (
+        search or None,
+        category or None,
+        float(min_price) if min_price is not None else None,
+        float(max_price) if max_price is not None else None,
+        sort or None,
+        limit,
+        cursor,
+        bins,
+    )
+
+
+class ResponseCache:
+    """Ограниченный LRU-кэш готовых (сериализованных) ответов.
+
+    Ключ включает версию каталога: после изменения товаров старые записи
+    становятся недостижимыми, а invalidate() сразу освобождает память.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Готовый ответ из кэша или None; промах здесь не считается — его посчитает get_or_compute."""
+        start = time.perf_counter()
+        with self._lock:
+            body = self._data.get(key)
+            if body is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self.hit_seconds += time.perf_counter() - start
+            return body
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]) -> bytes:
+        start = time.perf_counter()
+        body = self.get(key)
+        if body is not None:
+            return body
+        with span("compute"):
+            data = compute()
+        with span("serialize"):
+            body = dumps(data)
+        with self._lock:
+            self._data[key] = body
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self.misses += 1
+            self.miss_seconds += time.perf_counter() - start
+        return body
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            avg_hit = self.hit_seconds / self.hits if self.hits else 0.0
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "avg_miss_ms": avg_miss * 1000,
+                "avg_hit_ms": avg_hit * 1000,
+                # Оценка: каждое попадание сэкономило среднюю стоимость промаха
+                "saved_ms": max(avg_miss - avg_hit, 0.0) * self.hits * 1000,
+            }
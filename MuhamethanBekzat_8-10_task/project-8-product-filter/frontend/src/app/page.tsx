@@ -10,12 +10,20 @@ interface Product {
   price: number;
 }
 
+interface ProductPage {
+  items: Product[];
+  total: number;
+  next_cursor: string | null;
+}
+
 const API_URL = 'http://localhost:8000/api';
 
 export default function Home() {
   // Состояния для данных
   const [products, setProducts] = useState<Product[]>([]);
   const [categories, setCategories] = useState<string[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   // Состояния для фильтров
   const [searchTerm, setSearchTerm] = useState('');
@@ -41,20 +49,25 @@ export default function Home() {
     fetchCategories();
   }, []);
 
+  const buildParams = () => {
+    const params = new URLSearchParams();
+    if (searchTerm) params.append('search', searchTerm);
+    if (selectedCategory && selectedCategory !== 'All') params.append('category', selectedCategory);
+    if (minPrice) params.append('min_price', minPrice);
+    if (maxPrice) params.append('max_price', maxPrice);
+    if (sort) params.append('sort', sort);
+    return params;
+  };
+
   // Основной эффект для загрузки продуктов при изменении фильтров
   useEffect(() => {
     const fetchProducts = async () => {
       setLoading(true);
       try {
-        const params = new URLSearchParams();
-        if (searchTerm) params.append('search', searchTerm);
-        if (selectedCategory && selectedCategory !== 'All') params.append('category', selectedCategory);
-        if (minPrice) params.append('min_price', minPrice);
-        if (maxPrice) params.append('max_price', maxPrice);
-        if (sort) params.append('sort', sort);
-
-        const response = await axios.get(`${API_URL}/products?${params.toString()}`);
-        setProducts(response.data);
+        const response = await axios.get<ProductPage>(`${API_URL}/products?${buildParams().toString()}`);
+        setProducts(response.data.items);
+        setTotal(response.data.total);
+        setNextCursor(response.data.next_cursor);
       } catch (error) {
         console.error('Failed to fetch products:', error);
       } finally {
@@ -68,6 +81,20 @@ export default function Home() {
     return () => clearTimeout(handler);
   }, [searchTerm, selectedCategory, minPrice, maxPrice, sort]); // Этот эффект перезапустится при изменении любого из этих состояний
 
+  // Догрузка следующей страницы по курсору
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const params = buildParams();
+      params.append('cursor', nextCursor);
+      const response = await axios.get<ProductPage>(`${API_URL}/products?${params.toString()}`);
+      setProducts(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch products:', error);
+    }
+  };
+
   return (
     <div className="bg-gray-50 min-h-screen">
       <header className="bg-white shadow-sm p-4">
@@ -140,6 +167,16 @@ export default function Home() {
             )}
           </div>
         )}
+        {!loading && (
+          <div className="text-center mt-8">
+            <p className="text-gray-500">Показано {products.length} из {total}</p>
+            {nextCursor && (
+              <button onClick={loadMore} className="mt-2 px-4 py-2 bg-blue-600 text-white rounded-md">
+                Показать ещё
+              </button>
+            )}
+          </div>
+        )}
       </main>
     </div>
   );
@@ -0,0 +1,86 @@
+"""Бенчмарк: p50/p99 защищённого эндпоинта /api/secret-data под нагрузкой логинами.
+
+Приложение запускается в процессе через ASGI-транспорт httpx. Сценарии:
+  * без нагрузки — базовая задержка;
+  * inline — хэш проверяется прямо в event loop (как было бы без пула);
+  * pool — хэш в ограниченном пуле потоков, лимитер отключён;
+  * pool+limit — пул и token bucket по логину/IP.
+
+Запуск: python bench_login.py [секунд на сценарий]   (по умолчанию 5)
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+import main
+from ratelimit import TokenBucketLimiter
+from users import PasswordVerifier
+
+LOGIN_CONCURRENCY = 4
+READ_CONCURRENCY = 4
+READ_INTERVAL = 0.01  # каждый читатель — 100 запросов/с
+
+
+async def reader(client, headers, deadline, latencies):
+    # Открытая модель нагрузки: запрос «должен» уйти по расписанию, и задержка
+    # считается от запланированного момента — так видны остановки event loop
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        await asyncio.sleep(max(delay, 0))
+        response = await client.get("/api/secret-data", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - scheduled)
+        scheduled += READ_INTERVAL
+
+
+async def attacker(client, deadline, counts):
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/login", data={"username": "user", "password": "wrong"})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        await asyncio.sleep(0)
+
+
+async def scenario(name, seconds, login_load):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        main.LOGIN_LIMIT_BY_USER._buckets.clear()
+        main.LOGIN_LIMIT_BY_IP._buckets.clear()
+        token = (await client.post("/api/login", data={"username": "user", "password": "password"})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        deadline = time.perf_counter() + seconds
+        latencies, counts = [], {}
+        tasks = [reader(client, headers, deadline, latencies) for _ in range(READ_CONCURRENCY)]
+        if login_load:
+            tasks += [attacker(client, deadline, counts) for _ in range(LOGIN_CONCURRENCY)]
+        await asyncio.gather(*tasks)
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    logins = ", ".join(f"{code}: {n}" for code, n in sorted(counts.items())) or "-"
+    print(f"{name:<12} запросов {len(latencies):6d} | p50 {p50:7.2f} мс | p99 {p99:7.2f} мс | логины {logins}")
+
+
+async def run(seconds):
+    unlimited = TokenBucketLimiter(capacity=10 ** 9, rate=10 ** 9)
+    limited_user, limited_ip = main.LOGIN_LIMIT_BY_USER, main.LOGIN_LIMIT_BY_IP
+
+    await scenario("без нагрузки", seconds, login_load=False)
+
+    main.PASSWORD_VERIFIER = PasswordVerifier(max_workers=0)
+    main.LOGIN_LIMIT_BY_USER = main.LOGIN_LIMIT_BY_IP = unlimited
+    await scenario("inline", seconds, login_load=True)
+
+    main.PASSWORD_VERIFIER = PasswordVerifier(max_workers=2)
+    await scenario("pool", seconds, login_load=True)
+
+    main.LOGIN_LIMIT_BY_USER, main.LOGIN_LIMIT_BY_IP = limited_user, limited_ip
+    await scenario("pool+limit", seconds, login_load=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0))
@@ -0,0 +1,48 @@
+"""Бенчмарк проверки токена: хранилище в памяти против stateless-токенов с HMAC.
+
+Запуск: python bench_tokens.py [число активных токенов]   (по умолчанию 100000)
+"""
+import sys
+import time
+
+from tokens import SignedTokens, TokenStore
+
+LIFETIME = 3600.0
+ITERATIONS = 200_000
+
+
+def per_call(fn, tokens) -> float:
+    count = len(tokens)
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        fn(tokens[i % count])
+    return (time.perf_counter() - start) / ITERATIONS
+
+
+def main(active: int) -> None:
+    store = TokenStore(lifetime=LIFETIME, max_tokens=active)
+    signed = SignedTokens("bench-secret", lifetime=LIFETIME)
+
+    for name, backend in [("memory", store), ("signed", signed)]:
+        start = time.perf_counter()
+        tokens = [backend.issue(f"user{i}", "admin") for i in range(active)]
+        issue = (time.perf_counter() - start) / active
+        valid = per_call(backend.get, tokens)
+        invalid = per_call(backend.get, [t[:-4] + "AAAA" for t in tokens[:1000]])
+        print(
+            f"{name:<7} выдача {issue * 1e6:6.2f} мкс | проверка {valid * 1e6:6.2f} мкс"
+            f" | отказ {invalid * 1e6:6.2f} мкс"
+        )
+
+    # Заброшенные сессии: колесо вычищает их без повторного предъявления токена
+    short = TokenStore(lifetime=1.0, max_tokens=active, tick=0.25)
+    for i in range(active):
+        short.issue(f"user{i}", "admin")
+    time.sleep(1.6)
+    start = time.perf_counter()
+    short.get("missing")
+    print(f"вычистка {active} истёкших токенов: {(time.perf_counter() - start) * 1000:.1f} мс, осталось {len(short)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,22 +1,52 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from typing import Annotated
-import uuid
-from datetime import datetime, timedelta
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+import request_metrics
+from request_metrics import span
+from ratelimit import TokenBucketLimiter
+from tokens import SignedTokens, TokenStore
+from users import PasswordVerifier, UserStore
+
+load_dotenv()
 
 app = FastAPI()
+request_metrics.install(app)
 
 # --- CORS ---
 origins = ["http://localhost:3000"]
 app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-# --- Фейковые данные ---
-FAKE_USER = {"username": "user", "password": "password", "role": "admin"}
-TOKENS = {}  # token: {"username": ..., "role": ..., "created": ...}
+# --- Пользователи ---
+# Пароли хранятся только в виде scrypt-хэшей
+USERS = UserStore()
+USERS.add("user", "password", role="admin")
+# Проверка хэша (~50 мс CPU) идёт в отдельном ограниченном пуле, а не в event loop
+PASSWORD_VERIFIER = PasswordVerifier(max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")))
+# Ограничение попыток входа: 5 подряд на логин и 20 на IP, дальше — по одной в 10 с / 1 с
+LOGIN_LIMIT_BY_USER = TokenBucketLimiter(capacity=5, rate=0.1)
+LOGIN_LIMIT_BY_IP = TokenBucketLimiter(capacity=20, rate=1.0)
 TOKEN_LIFETIME = timedelta(hours=1)
 
+# --- Хранилище токенов ---
+# TOKEN_MODE=memory (по умолчанию) — токены в памяти процесса с вычисткой истёкших;
+# TOKEN_MODE=signed — stateless-токены с HMAC-подписью, работают между воркерами
+TOKEN_MODE = os.getenv("TOKEN_MODE", "memory")
+if TOKEN_MODE == "signed":
+    TOKEN_SECRET = os.getenv("TOKEN_SECRET")
+    if not TOKEN_SECRET:
+        raise RuntimeError("TOKEN_SECRET must be set when TOKEN_MODE=signed")
+    TOKENS = SignedTokens(TOKEN_SECRET, lifetime=TOKEN_LIFETIME.total_seconds())
+else:
+    TOKENS = TokenStore(
+        lifetime=TOKEN_LIFETIME.total_seconds(),
+        max_tokens=int(os.getenv("TOKEN_STORE_SIZE", "100000")),
+    )
+
 # --- Модель ответа для токена ---
 class Token(BaseModel):
     access_token: str
@@ -28,28 +58,37 @@ async def token_verifier(authorization: Annotated[str, Header()]):
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme")
     token = authorization.split(" ")[1]
+    # Истёкший токен хранилище не возвращает
     user_info = TOKENS.get(token)
     if not user_info:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    # Проверка времени жизни токена
-    if datetime.utcnow() - user_info["created"] > TOKEN_LIFETIME:
-        del TOKENS[token]
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     return user_info
 
 # --- Эндпоинты API ---
 
 @app.post("/api/login", response_model=Token)
-async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+async def login_for_access_token(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     """Проверяет логин/пароль и возвращает токен."""
-    if form_data.username == FAKE_USER["username"] and form_data.password == FAKE_USER["password"]:
-        token = str(uuid.uuid4())
-        TOKENS[token] = {
-            "username": FAKE_USER["username"],
-            "role": FAKE_USER["role"],
-            "created": datetime.utcnow()
-        }
-        return {"access_token": token, "token_type": "bearer", "role": FAKE_USER["role"]}
+    # Лимиты проверяются до хэширования, чтобы перебор паролей не тратил CPU
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = max(
+        LOGIN_LIMIT_BY_IP.acquire(client_ip),
+        LOGIN_LIMIT_BY_USER.acquire(form_data.username),
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
+    user = USERS.get(form_data.username)
+    password_hash = user["password_hash"] if user else USERS.dummy_hash
+    with span("hash"):
+        password_ok = await PASSWORD_VERIFIER.verify(form_data.password, password_hash)
+    if password_ok and user:
+        token = TOKENS.issue(user["username"], user["role"])
+        return {"access_token": token, "token_type": "bearer", "role": user["role"]}
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Incorrect username or password",
@@ -62,7 +101,7 @@ async def logout(authorization: Annotated[str, Header()]):
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme")
     token = authorization.split(" ")[1]
-    TOKENS.pop(token, None)
+    TOKENS.revoke(token)
     return {"detail": "Logged out"}
 
 @app.get("/api/secret-data")
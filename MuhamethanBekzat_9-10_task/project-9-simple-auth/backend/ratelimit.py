@@ -0,0 +1,44 @@
+import time
+from threading import Lock
+from typing import Dict, List
+
+
+class TokenBucketLimiter:
+    """Token bucket на каждый ключ (логин, IP): capacity попыток подряд, затем rate в секунду.
+
+    Корзины, которые успели полностью наполниться, ничего не ограничивают и
+    удаляются при переполнении словаря, так что память ограничена max_keys.
+    """
+
+    def __init__(self, capacity: float, rate: float, max_keys: int = 100_000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: Dict[str, List[float]] = {}  # ключ: [осталось попыток, время обновления]
+        self._lock = Lock()
+
+    def _prune(self, now: float) -> None:
+        full = [key for key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate >= self.capacity]
+        for key in full:
+            del self._buckets[key]
+        # Если всё ещё тесно — выбрасываем самые старые корзины
+        while len(self._buckets) >= self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+
+    def acquire(self, key: str) -> float:
+        """Забирает попытку. Возвращает 0, если можно, иначе сколько секунд ждать."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.capacity, now]
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                return (1 - tokens) / self.rate
+            bucket[0] = tokens - 1
+            return 0.0
@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import hmac
+import json
+import math
+import secrets
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Set
+
+
+class TokenRecord:
+    """Компактная запись о токене: только то, что нужно для проверки."""
+
+    __slots__ = ("username", "role", "expires_at")
+
+    def __init__(self, username: str, role: str, expires_at: float):
+        self.username = username
+        self.role = role
+        self.expires_at = expires_at
+
+    def to_user_info(self) -> dict:
+        return {"username": self.username, "role": self.role, "expires_at": self.expires_at}
+
+
+class TokenStore:
+    """Хранилище токенов в памяти процесса с ограниченным размером.
+
+    Истёкшие токены вычищаются колесом таймеров: каждый токен лежит в слоте,
+    соответствующем времени его истечения. При каждом обращении колесо
+    «прокручивается» до текущего времени и очищаются только прошедшие слоты,
+    так что заброшенные сессии удаляются, даже если токен больше не предъявят.
+    При переполнении вытесняется самый старый токен.
+    """
+
+    def __init__(self, lifetime: float, max_tokens: int = 100_000, tick: float = 60.0):
+        self.lifetime = lifetime
+        self.max_tokens = max_tokens
+        self.tick = tick
+        # Колесо покрывает всё время жизни токена, поэтому слот не содержит токенов «следующего оборота»
+        self._wheel: List[Set[str]] = [set() for _ in range(math.ceil(lifetime / tick) + 2)]
+        self._tokens: Dict[str, TokenRecord] = {}  # порядок вставки = порядок истечения
+        self._current_tick = int(time.time() // tick)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _slot(self, tick_no: int) -> Set[str]:
+        return self._wheel[tick_no % len(self._wheel)]
+
+    def _advance(self, now: float) -> None:
+        target = int(now // self.tick)
+        # После долгого простоя достаточно одного полного оборота
+        start = max(self._current_tick, target - len(self._wheel))
+        for tick_no in range(start, target):
+            slot = self._slot(tick_no)
+            for token in slot:
+                self._tokens.pop(token, None)
+            slot.clear()
+        self._current_tick = max(self._current_tick, target)
+
+    def issue(self, username: str, role: str) -> str:
+        token = secrets.token_urlsafe(24)
+        now = time.time()
+        expires_at = now + self.lifetime
+        with self._lock:
+            self._advance(now)
+            while len(self._tokens) >= self.max_tokens:
+                oldest = next(iter(self._tokens))
+                self._discard(oldest)
+            self._tokens[token] = TokenRecord(username, role, expires_at)
+            # Слот берётся с округлением вверх: токен удаляется не раньше истечения
+            self._slot(math.ceil(expires_at / self.tick)).add(token)
+        return token
+
+    def _discard(self, token: str) -> None:
+        record = self._tokens.pop(token, None)
+        if record is not None:
+            self._slot(math.ceil(record.expires_at / self.tick)).discard(token)
+
+    def get(self, token: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            self._advance(now)
+            record = self._tokens.get(token)
+            if record is None:
+                return None
+            if record.expires_at <= now:
+                self._discard(token)
+                return None
+            return record.to_user_info()
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._discard(token)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SignedTokens:
+    """Stateless-токены: полезная нагрузка (username, role, срок) + HMAC-SHA256.
+
+    Проверка не требует общего состояния, поэтому токен, выданный одним
+    воркером, принимается любым другим с тем же секретом. Отозвать такой
+    токен до истечения срока нельзя — logout лишь удаляет его на клиенте.
+    """
+
+    def __init__(self, secret: str, lifetime: float):
+        self._key = secret.encode("utf-8")
+        self.lifetime = lifetime
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._key, payload.encode("utf-8"), hashlib.sha256).digest())
+
+    def issue(self, username: str, role: str) -> str:
+        claims = {"sub": username, "role": role, "exp": int(time.time() + self.lifetime)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def get(self, token: str) -> Optional[dict]:
+        payload, _, signature = token.partition(".")
+        expected = self._sign(payload)
+        if not signature or not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+        if claims["exp"] <= time.time():
+            return None
+        return {"username": claims["sub"], "role": claims["role"], "expires_at": claims["exp"]}
+
+    def revoke(self, token: str) -> None:
+        pass
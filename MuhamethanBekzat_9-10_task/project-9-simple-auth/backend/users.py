@@ -0,0 +1,67 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+# Параметры scrypt: ~50 мс CPU на одну проверку на обычной машине
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """Солёный scrypt-хэш в формате scrypt$n$r$p$соль$хэш."""
+    salt = salt or os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+    return "$".join([
+        "scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P),
+        base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii"),
+    ])
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Сравнивает пароль с хэшем за постоянное время."""
+    _, n, r, p, salt, expected = encoded.split("$")
+    digest = hashlib.scrypt(
+        password.encode("utf-8"), salt=base64.b64decode(salt), n=int(n), r=int(r), p=int(p)
+    )
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+class UserStore:
+    """Пользователи в памяти; пароли хранятся только в виде scrypt-хэшей."""
+
+    def __init__(self):
+        self._users: Dict[str, dict] = {}
+        # Хэш для несуществующих пользователей: время ответа не выдаёт, есть ли логин
+        self.dummy_hash = hash_password(os.urandom(8).hex())
+
+    def add(self, username: str, password: str, role: str) -> None:
+        self._users[username] = {"username": username, "role": role, "password_hash": hash_password(password)}
+
+    def get(self, username: str) -> Optional[dict]:
+        return self._users.get(username)
+
+
+class PasswordVerifier:
+    """Проверяет пароли в ограниченном пуле потоков, не блокируя event loop.
+
+    hashlib.scrypt отпускает GIL, поэтому потоков достаточно. Размер пула
+    ограничивает, сколько ядер одновременно может занять вход в систему;
+    max_workers=0 проверяет прямо в event loop (только для сравнения в бенчмарке).
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = None
+        if max_workers:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pwhash")
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        if self._executor is None:
+            return verify_password(password, encoded)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, verify_password, password, encoded)
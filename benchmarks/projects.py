@@ -0,0 +1,379 @@
+"""Сценарии нагрузки для каждого из десяти бэкендов.
+
+У проекта две функции:
+  * setup(main, args) -> state — наполняет приложение синтетическими данными
+    (масштаб args.scale) и ставит заглушки; вызывается в процессе приложения
+    после импорта его main.py, рабочая папка — временная;
+  * endpoints(state) -> [Endpoint] — генераторы запросов. state — только
+    JSON-совместимые данные (id, коды, токены), поэтому нагрузку можно
+    подавать и из другого процесса, когда приложение запущено под uvicorn.
+"""
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import httpx
+
+Request = Tuple[str, str, dict]  # метод, путь, аргументы httpx (json=, files=, headers=...)
+
+# Сколько id/кодов из набора данных уходит в state для генерации запросов
+SAMPLE = 1000
+
+WORDS = (
+    "привет мир сегодня погода кофе код релиз баг фича отпуск город книга музыка "
+    "python fastapi nextjs база данных сервер клиент запрос ответ кэш индекс"
+).split()
+CATEGORIES = ["Электроника", "Одежда", "Книги", "Дом", "Спорт", "Игрушки", "Красота", "Авто", "Сад", "Еда"]
+CITIES = ["Almaty", "Astana", "Shymkent", "Karaganda", "Aktobe", "Taraz", "Pavlodar", "Oskemen"]
+
+
+class Endpoint(NamedTuple):
+    name: str
+    request: Callable[[random.Random], Request]
+    expect: Tuple[int, ...] = (200,)
+
+
+class Project(NamedTuple):
+    path: str
+    setup: Callable[[object, object], dict]
+    endpoints: Callable[[dict], List[Endpoint]]
+
+
+def sentence(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(lo, hi)))
+
+
+def sample(rng: random.Random, items: list) -> list:
+    return rng.sample(items, min(SAMPLE, len(items)))
+
+
+# --- project-1: todo ---
+def setup_todos(main, args) -> dict:
+    rng = random.Random(1)
+    main.fake_todo_db.extend(
+        main.TodoItem(id=str(uuid.uuid4()), task=sentence(rng, 2, 12), completed=rng.random() < 0.3)
+        for _ in range(args.scale)
+    )
+    return {"todo_ids": sample(rng, [todo.id for todo in main.fake_todo_db])}
+
+
+def todo_endpoints(state: dict) -> List[Endpoint]:
+    ids = state["todo_ids"]
+    return [
+        Endpoint("GET /api/todos", lambda rng: ("GET", "/api/todos", {})),
+        Endpoint("POST /api/todos", lambda rng: ("POST", "/api/todos", {"json": {"task": sentence(rng, 2, 12)}}), (201,)),
+        Endpoint("PATCH /api/todos/{id}", lambda rng: ("PATCH", f"/api/todos/{rng.choice(ids)}", {})),
+        Endpoint(
+            "PUT /api/todos/{id}",
+            lambda rng: ("PUT", f"/api/todos/{rng.choice(ids)}", {"json": {"task": sentence(rng, 2, 12)}}),
+        ),
+    ]
+
+
+# --- project-2: блог ---
+def setup_blog(main, args) -> dict:
+    rng = random.Random(2)
+    start = datetime(2024, 1, 1)
+    main.fake_posts_db.extend(
+        main.PostFull(
+            slug=f"post-{i}",
+            title=sentence(rng, 2, 8).capitalize(),
+            content=sentence(rng, 50, 400),
+            author=f"Автор {rng.randint(1, 50)}",
+            date=(start + timedelta(days=i // 10)).date().isoformat(),
+            category=rng.choice(CATEGORIES),
+        )
+        for i in range(args.scale)
+    )
+    return {"slugs": sample(rng, [post.slug for post in main.fake_posts_db])}
+
+
+def blog_endpoints(state: dict) -> List[Endpoint]:
+    slugs = state["slugs"]
+    return [
+        Endpoint("GET /api/posts", lambda rng: ("GET", "/api/posts", {})),
+        Endpoint("GET /api/posts/{slug}", lambda rng: ("GET", f"/api/posts/{rng.choice(slugs)}", {})),
+    ]
+
+
+# --- project-3: погода, OpenWeather заменён заглушкой ---
+def openweather_stub(latency: float) -> SimpleNamespace:
+    """Подмена модуля httpx в main: AsyncClient ходит в MockTransport вместо сети."""
+    forecast = {
+        "list": [
+            {
+                "dt_txt": f"2024-06-0{1 + i // 8} {i % 8 * 3:02d}:00:00",
+                "main": {"temp": 20 + i % 7},
+                "weather": [{"description": "ясно", "icon": "01d"}],
+            }
+            for i in range(40)
+        ]
+    }
+    weather = {"name": "Almaty", "main": {"temp": 23.5}, "weather": [{"description": "ясно", "icon": "01d"}]}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        if request.url.path.endswith("/forecast"):
+            if request.url.params.get("q") == "Nowhere":
+                return httpx.Response(404, json={"message": "city not found"})
+            return httpx.Response(200, json=forecast)
+        return httpx.Response(200, json=weather)
+
+    transport = httpx.MockTransport(handler)
+    return SimpleNamespace(AsyncClient=lambda **kwargs: httpx.AsyncClient(transport=transport, **kwargs))
+
+
+def setup_weather(main, args) -> dict:
+    main.API_KEY = main.API_KEY or "bench"
+    main.httpx = openweather_stub(args.upstream_latency / 1000)
+    return {"cities": CITIES}
+
+
+def weather_endpoints(state: dict) -> List[Endpoint]:
+    cities = state["cities"] + ["Nowhere"]
+    return [
+        Endpoint("GET /api/forecast/{city}", lambda rng: ("GET", f"/api/forecast/{rng.choice(cities)}", {}), (200, 404)),
+        Endpoint(
+            "GET /api/weather/coords",
+            lambda rng: ("GET", f"/api/weather/coords?lat={rng.uniform(40, 55):.4f}&lon={rng.uniform(50, 85):.4f}", {}),
+        ),
+    ]
+
+
+# --- project-4: сокращатель ссылок ---
+def setup_shortener(main, args) -> dict:
+    rng = random.Random(4)
+    created_at = datetime.utcnow().isoformat()
+    for i in range(args.scale):
+        main.url_db[f"c{i:07d}"] = {
+            "long_url": f"https://example.com/{'/'.join(rng.choices(WORDS, k=3))}?id={i}",
+            "clicks": rng.randint(0, 1000),
+            "created_at": created_at,
+        }
+    return {"codes": sample(rng, list(main.url_db))}
+
+
+def shortener_endpoints(state: dict) -> List[Endpoint]:
+    codes = state["codes"]
+    return [
+        Endpoint("GET /{short_code}", lambda rng: ("GET", f"/{rng.choice(codes)}", {}), (307,)),
+        Endpoint("GET /api/stats/{short_code}", lambda rng: ("GET", f"/api/stats/{rng.choice(codes)}", {})),
+        Endpoint(
+            "POST /api/shorten",
+            lambda rng: ("POST", "/api/shorten", {"json": {"long_url": f"https://example.com/{rng.getrandbits(64):x}"}}),
+        ),
+    ]
+
+
+# --- project-5: голосование ---
+def setup_poll(main, args) -> dict:
+    return {"options": list(main.poll_data["options"])}
+
+
+def poll_endpoints(state: dict) -> List[Endpoint]:
+    options = state["options"]
+    return [
+        Endpoint("GET /api/poll", lambda rng: ("GET", "/api/poll", {})),
+        Endpoint("POST /api/poll/vote/{option}", lambda rng: ("POST", f"/api/poll/vote/{rng.choice(options)}", {})),
+    ]
+
+
+# --- project-6: галерея ---
+def setup_gallery(main, args) -> dict:
+    rng = random.Random(6)
+    names = []
+    for _ in range(args.scale):
+        name = f"{uuid.uuid4()}.jpg"
+        with open(f"{main.IMAGE_DIR}{name}", "wb") as f:
+            f.write(rng.randbytes(rng.randint(500, 8_000)))
+        names.append(name)
+    return {"images": sample(rng, names)}
+
+
+def gallery_endpoints(state: dict) -> List[Endpoint]:
+    images = state["images"]
+    upload = random.Random(0).randbytes(200_000)
+    return [
+        Endpoint("GET /api/images", lambda rng: ("GET", "/api/images", {})),
+        Endpoint("GET /static/images/{file}", lambda rng: ("GET", f"/static/images/{rng.choice(images)}", {})),
+        Endpoint(
+            "POST /api/upload",
+            lambda rng: ("POST", "/api/upload", {"files": {"file": ("photo.jpg", upload, "image/jpeg")}}),
+        ),
+    ]
+
+
+# --- project-7: гостевая книга ---
+def setup_guestbook(main, args) -> dict:
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    entries = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Гость {rng.randint(1, 5000)}",
+            "message": sentence(rng, 3, 60),
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(args.scale)
+    ]
+    with open(main.DB_FILE, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=4, ensure_ascii=False)
+    return {"entry_ids": sample(rng, [entry["id"] for entry in entries]), "pages": max(1, args.scale // 10)}
+
+
+def guestbook_endpoints(state: dict) -> List[Endpoint]:
+    ids, pages = state["entry_ids"], state["pages"]
+    return [
+        Endpoint("GET /api/entries", lambda rng: ("GET", f"/api/entries?page={rng.randint(1, pages)}&limit=10", {})),
+        Endpoint(
+            "POST /api/entries",
+            lambda rng: ("POST", "/api/entries", {"json": {"name": "Гость", "message": sentence(rng, 3, 60)}}),
+            (201,),
+        ),
+        Endpoint(
+            "PUT /api/entries/{id}",
+            lambda rng: ("PUT", f"/api/entries/{rng.choice(ids)}", {"json": {"message": sentence(rng, 3, 60)}}),
+        ),
+    ]
+
+
+# --- project-8: каталог товаров ---
+def setup_products(main, args) -> dict:
+    rng = random.Random(8)
+    main.PRODUCTS_DB[:] = [
+        {
+            "id": i + 1,
+            "name": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {rng.randint(1, 999)}",
+            "category": rng.choice(CATEGORIES),
+            "price": round(rng.lognormvariate(4, 1), 2),
+        }
+        for i in range(args.scale)
+    ]
+    main.invalidate_catalog()
+    return {"categories": CATEGORIES, "words": WORDS, "products": len(main.PRODUCTS_DB)}
+
+
+def product_endpoints(state: dict) -> List[Endpoint]:
+    categories, words = state["categories"], state["words"]
+    cursors = min(100, state["products"])
+
+    def filtered(rng: random.Random) -> Request:
+        params = {"category": rng.choice(categories), "min_price": rng.randint(0, 100), "sort": "price_asc"}
+        if rng.random() < 0.5:
+            params["search"] = rng.choice(words)[:4]
+        return "GET", "/api/products", {"params": params}
+
+    return [
+        Endpoint("GET /api/products", lambda rng: ("GET", "/api/products", {})),
+        Endpoint("GET /api/products?filters", filtered),
+        Endpoint(
+            "GET /api/products?cursor",
+            lambda rng: ("GET", "/api/products", {"params": {"sort": "price_desc", "cursor": rng.randrange(cursors)}}),
+        ),
+        Endpoint("GET /api/categories", lambda rng: ("GET", "/api/categories", {})),
+    ]
+
+
+# --- project-9: авторизация ---
+def setup_auth(main, args) -> dict:
+    rng = random.Random(9)
+    tokens = [main.TOKENS.issue("user", "admin") for _ in range(min(args.scale, 100_000))]
+    return {"tokens": sample(rng, tokens)}
+
+
+def auth_endpoints(state: dict) -> List[Endpoint]:
+    tokens = state["tokens"]
+
+    def authorized(path: str) -> Callable[[random.Random], Request]:
+        return lambda rng: ("GET", path, {"headers": {"Authorization": f"Bearer {rng.choice(tokens)}"}})
+
+    return [
+        Endpoint("GET /api/secret-data", authorized("/api/secret-data")),
+        Endpoint("GET /api/admin-data", authorized("/api/admin-data")),
+        # Почти все попытки упираются в лимитер — меряется в основном его быстрый путь
+        Endpoint(
+            "POST /api/login",
+            lambda rng: ("POST", "/api/login", {"data": {"username": "user", "password": "wrong"}}),
+            (401, 429),
+        ),
+    ]
+
+
+# --- project-10: микроблог ---
+def setup_microblog(main, args) -> dict:
+    rng = random.Random(10)
+    users = list(main.FAKE_USERS_DB.values())
+    start = datetime(2024, 1, 1)
+    posts = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": sentence(rng, 3, 40),
+            "timestamp": start + timedelta(seconds=i * 30),
+            "owner_id": rng.choice(users)["id"],
+        }
+        for i in range(args.scale)
+    ]
+    with main.engine.begin() as conn:
+        conn.execute(main.UserDB.__table__.insert(), [{"id": u["id"], "username": u["username"]} for u in users])
+        conn.execute(main.PostDB.__table__.insert(), posts)
+        conn.execute(main.LikeDB.__table__.insert(), [
+            {"id": str(uuid.uuid4()), "user_id": user["id"], "post_id": post["id"]}
+            for post in posts
+            for user in users
+            if rng.random() < 0.2
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    return {
+        "post_ids": sample(rng, [post["id"] for post in posts]),
+        "usernames": [u["username"] for u in users],
+        "words": WORDS,
+    }
+
+
+def microblog_endpoints(state: dict) -> List[Endpoint]:
+    post_ids, usernames, words = state["post_ids"], state["usernames"], state["words"]
+
+    def auth(rng: random.Random) -> dict:
+        # В этом проекте токен — имя пользователя
+        return {"Authorization": f"Bearer {rng.choice(usernames)}"}
+
+    return [
+        Endpoint("GET /api/posts", lambda rng: ("GET", "/api/posts?limit=20", {"headers": auth(rng)})),
+        Endpoint(
+            "GET /api/users/{username}/posts",
+            lambda rng: ("GET", f"/api/users/{rng.choice(usernames)}/posts?limit=20", {"headers": auth(rng)}),
+        ),
+        Endpoint(
+            "GET /api/posts/search",
+            lambda rng: ("GET", "/api/posts/search", {"params": {"q": rng.choice(words), "limit": 20}, "headers": auth(rng)}),
+        ),
+        Endpoint(
+            "POST /api/posts/{id}/like",
+            lambda rng: ("POST", f"/api/posts/{rng.choice(post_ids)}/like", {"headers": auth(rng)}),
+            (201,),
+        ),
+        Endpoint(
+            "POST /api/posts",
+            lambda rng: ("POST", "/api/posts", {"json": {"text": sentence(rng, 3, 40)}, "headers": auth(rng)}),
+            (201,),
+        ),
+    ]
+
+
+PROJECTS: Dict[str, Project] = {
+    "project-1": Project("MuhamethanBekzat_1-10_task/project-1-fullstack-todo/backend", setup_todos, todo_endpoints),
+    "project-2": Project("MuhamethanBekzat_2-10_task/project-2-minimalist-blog/backend", setup_blog, blog_endpoints),
+    "project-3": Project("MuhamethanBekzat_3-10_task/project-3-weather-app/backend", setup_weather, weather_endpoints),
+    "project-4": Project("MuhamethanBekzat_4-10_task/project-4-url-shortener/backend", setup_shortener, shortener_endpoints),
+    "project-5": Project("MuhamethanBekzat_5-10_task/project-5-real-time-poll/backend", setup_poll, poll_endpoints),
+    "project-6": Project("MuhamethanBekzat_6-10_task/project-6-image-gallery/backend", setup_gallery, gallery_endpoints),
+    "project-7": Project("MuhamethanBekzat_7-10_task/project-7-json-guestbook/backend", setup_guestbook, guestbook_endpoints),
+    "project-8": Project("MuhamethanBekzat_8-10_task/project-8-product-filter/backend", setup_products, product_endpoints),
+    "project-9": Project("MuhamethanBekzat_9-10_task/project-9-simple-auth/backend", setup_auth, auth_endpoints),
+    "project-10": Project("MuhamethanBekzat_10-10_task/project-10-microblog-app/backend", setup_microblog, microblog_endpoints),
+}
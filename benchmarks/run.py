@@ -0,0 +1,317 @@
+"""Общий нагрузочный бенчмарк для всех десяти бэкендов.
+
+Каждый проект гоняется в отдельном процессе во временной рабочей папке, так что
+файлы данных (data/*.json, poll_data.json, static/images, app.db) реальных
+проектов не трогаются. Перед замером приложение наполняется синтетическими
+данными (--scale записей), OpenWeather для project-3 заменён заглушкой
+(см. projects.py). Режимы:
+  * asgi    — запросы идут прямо в app через httpx.ASGITransport, без сети;
+  * uvicorn — приложение поднимается настоящим uvicorn в отдельном процессе,
+              нагрузка идёт по TCP, RSS берётся у процесса сервера.
+
+Для каждого эндпоинта: --concurrency клиентов в закрытом цикле на --duration
+секунд после прогрева. В отчёте запросов/с, p50/p95/p99, неожиданные статусы,
+RSS процесса с приложением (в режиме asgi в нём же и клиент). Результаты
+пишутся в JSON вместе с коммитом; --baseline сравнивает с прошлым прогоном.
+
+Запуск:
+    python benchmarks/run.py [--projects 1,8,10] [--mode asgi|uvicorn] [--scale 10000]
+                             [--duration 3] [--concurrency 16] [--output bench_results.json]
+                             [--baseline старый.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import httpx
+
+from projects import PROJECTS, Endpoint
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb(pid: int) -> Tuple[Optional[float], Optional[float]]:
+    """Текущий и пиковый RSS процесса в МБ (Linux, /proc); иначе None."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, kb = line.split()[:2]
+                    values[key] = int(kb) / 1024
+    except OSError:
+        return None, None
+    return values.get("VmRSS:"), values.get("VmHWM:")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] if sorted_values else 0.0
+
+
+async def drive(client: httpx.AsyncClient, endpoint: Endpoint, seconds: float, concurrency: int, seed: int):
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i: int) -> None:
+        rng = random.Random(seed * 10_000 + i)
+        while time.perf_counter() < deadline:
+            method, url, kwargs = endpoint.request(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, statuses
+
+
+async def measure(client: httpx.AsyncClient, project: str, endpoints: List[Endpoint], args, pid: int) -> List[dict]:
+    results = []
+    for n, endpoint in enumerate(endpoints):
+        if args.warmup:
+            await drive(client, endpoint, args.warmup, args.concurrency, seed=n)
+        started = time.perf_counter()
+        latencies, statuses = await drive(client, endpoint, args.duration, args.concurrency, seed=n + 1000)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        rss, peak_rss = rss_mb(pid)
+        results.append({
+            "project": project,
+            "endpoint": endpoint.name,
+            "requests": len(latencies),
+            "throughput": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "errors": sum(count for status, count in statuses.items() if status not in endpoint.expect),
+            "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            "rss_mb": rss,
+            "peak_rss_mb": peak_rss,
+        })
+    return results
+
+
+def load_app(key: str, args, workdir: str):
+    """Импортирует main.py проекта в рабочей папке workdir и наполняет его данными."""
+    project = PROJECTS[key]
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+    os.environ.setdefault("OPENWEATHER_API_KEY", "bench")
+    sys.path.insert(0, os.path.join(REPO_ROOT, project.path))
+    import main
+
+    state = project.setup(main, args)
+    return main.app, state
+
+
+def run_worker(key: str, args) -> None:
+    """Режим asgi: приложение и клиент в одном процессе, результат — в файл --result."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{key}-") as workdir:
+        app, state = load_app(key, args, workdir)
+        endpoints = PROJECTS[key].endpoints(state)
+
+        async def run() -> List[dict]:
+            # Исключение в приложении — это ответ 500 в статистике, а не падение замера
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                return await measure(client, key, endpoints, args, os.getpid())
+
+        results = asyncio.run(run())
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+def run_server(key: str, args) -> None:
+    """Режим uvicorn: готовит приложение, печатает state первой строкой и обслуживает порт."""
+    import uvicorn
+
+    app, state = load_app(key, args, args.workdir)
+    print("STATE " + json.dumps(state), flush=True)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def child_args(args) -> List[str]:
+    return [
+        "--scale", str(args.scale), "--duration", str(args.duration), "--warmup", str(args.warmup),
+        "--concurrency", str(args.concurrency), "--upstream-latency", str(args.upstream_latency),
+    ]
+
+
+def bench_asgi(key: str, args) -> List[dict]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", key, "--result", result_path, *child_args(args)],
+            check=True,
+        )
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    for _ in range(300):
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn завершился при запуске")
+        try:
+            await client.get("/openapi.json")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn не запустился")
+
+
+def bench_uvicorn(key: str, args) -> List[dict]:
+    port = free_port()
+    # Папку удаляет родитель: uvicorn после SIGTERM завершает процесс тем же сигналом, минуя finally
+    workdir = tempfile.mkdtemp(prefix=f"bench-{key}-")
+    server = subprocess.Popen(
+        [
+            sys.executable, os.path.abspath(__file__), "--serve", key, "--port", str(port),
+            "--workdir", workdir, *child_args(args),
+        ],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        line = server.stdout.readline()
+        if not line.startswith("STATE "):
+            raise RuntimeError(f"сервер {key} не отдал state")
+        endpoints = PROJECTS[key].endpoints(json.loads(line[len("STATE "):]))
+
+        async def run() -> List[dict]:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_ready(client, server)
+                return await measure(client, key, endpoints, args, server.pid)
+
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"], cwd=REPO_ROOT, capture_output=True, text=True).stdout
+        return commit + ("-dirty" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: List[dict], baseline: Optional[dict]) -> None:
+    header = f"{'проект':<11} {'эндпоинт':<34} {'запр/с':>9} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'RSS МБ':>7} {'ошибок':>6}"
+    if baseline:
+        header += f" {'Δ запр/с':>9} {'Δ p99':>8}"
+    print(header)
+    for r in results:
+        if "error" in r:
+            print(f"{r['project']:<11} ОШИБКА: {r['error']}")
+            continue
+        rss = f"{r['rss_mb']:7.0f}" if r["rss_mb"] is not None else f"{'-':>7}"
+        line = (
+            f"{r['project']:<11} {r['endpoint']:<34} {r['throughput']:9.0f} {r['p50_ms']:8.2f}"
+            f" {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {rss} {r['errors']:6d}"
+        )
+        old = baseline.get((r["project"], r["endpoint"])) if baseline else None
+        if old and old["throughput"] and old["p99_ms"]:
+            line += (
+                f" {(r['throughput'] / old['throughput'] - 1) * 100:+8.1f}%"
+                f" {(r['p99_ms'] / old['p99_ms'] - 1) * 100:+7.1f}%"
+            )
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк всех бэкендов")
+    parser.add_argument("--projects", help="номера проектов через запятую (по умолчанию все)")
+    parser.add_argument("--mode", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--scale", type=int, default=10_000, help="объём синтетических данных на проект")
+    parser.add_argument("--duration", type=float, default=3.0, help="секунд замера на эндпоинт")
+    parser.add_argument("--warmup", type=float, default=0.5, help="секунд прогрева на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="задержка заглушки OpenWeather, мс")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    # Внутренние режимы дочерних процессов
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker:
+        return run_worker(args.worker, args)
+    if args.serve:
+        return run_server(args.serve, args)
+
+    keys = [f"project-{n.strip()}" for n in args.projects.split(",")] if args.projects else list(PROJECTS)
+    unknown = [key for key in keys if key not in PROJECTS]
+    if unknown:
+        sys.exit(f"Неизвестные проекты: {', '.join(unknown)}")
+
+    bench = bench_asgi if args.mode == "asgi" else bench_uvicorn
+    results = []
+    for key in keys:
+        print(f"== {key}", file=sys.stderr, flush=True)
+        try:
+            results.extend(bench(key, args))
+        except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+            results.append({"project": key, "error": str(e)})
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {(r["project"], r["endpoint"]): r for r in json.load(f)["results"] if "error" not in r}
+    print_results(results, baseline)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "mode": args.mode, "scale": args.scale, "duration": args.duration, "warmup": args.warmup,
+            "concurrency": args.concurrency, "upstream_latency_ms": args.upstream_latency,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Результаты: {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Замер времени запросов: гистограммы по маршрутам, Server-Timing и /metrics для Prometheus.
+
+install(app) подключает ASGI-middleware и эндпоинт /metrics. Внутри запроса
+участки кода размечаются span("io"), span("db"), span("upstream") или
+декоратором @timed("io"): их время суммируется по видам и уходит в заголовок
+Server-Timing (например, "io;dur=1.8, serialize;dur=0.3, app;dur=4.2") и в
+метрики. В span "serialize" попадает всё, что FastAPI делает после возврата
+из эндпоинта: проверка по response_model, jsonable_encoder и рендер ответа.
+
+METRICS_ENABLED=0 отключает всё: middleware и /metrics не ставятся, а span()
+возвращает общий пустой контекст — остаётся одно чтение contextvar.
+Метрики живут в памяти процесса: при нескольких воркерах у каждого свои.
+
+Модуль один на все бэкенды: каждый ставит его из requirements.txt
+(-e ../../../shared).
+"""
+import asyncio
+import functools
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+METRICS_PATH = "/metrics"
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def enabled() -> bool:
+    # Читается при подключении, а не при импорте: .env может загрузиться позже (load_dotenv)
+    return os.getenv("METRICS_ENABLED", "1") != "0"
+
+
+# Время по видам span'ов текущего запроса; None — вне запроса или метрики выключены
+_SPANS: ContextVar[Optional[Dict[str, float]]] = ContextVar("metrics_spans", default=None)
+# Момент возврата из эндпоинта; список, а не значение — синхронный эндпоинт
+# работает в пуле потоков с копией контекста, и set() оттуда не виден
+_ENDPOINT_DONE: ContextVar[Optional[List[float]]] = ContextVar("metrics_endpoint_done", default=None)
+
+
+class _Span:
+    __slots__ = ("spans", "kind", "start")
+
+    def __init__(self, spans: Dict[str, float], kind: str):
+        self.spans = spans
+        self.kind = kind
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.spans[self.kind] = self.spans.get(self.kind, 0.0) + perf_counter() - self.start
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(kind: str):
+    """Контекст, время которого добавляется к виду kind текущего запроса."""
+    spans = _SPANS.get()
+    return _NULL_SPAN if spans is None else _Span(spans, kind)
+
+
+def timed(kind: str):
+    """Декоратор: весь вызов функции (обычной или async) — span вида kind."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out, total = [], 0
+        for bound, count in zip(BUCKETS + ("+Inf",), self.counts):
+            total += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum}")
+        out.append(f"{name}_count{{{labels}}} {total}")
+        return out
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """Счётчики и гистограммы по (метод, шаблон маршрута); шаблон, а не путь, — чтобы id не плодили серии."""
+
+    def __init__(self):
+        self.in_progress = 0
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.spans: Dict[Tuple[str, str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, spans: Dict[str, float]) -> None:
+        with self._lock:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.durations.get((method, route))
+            if histogram is None:
+                histogram = self.durations[(method, route)] = Histogram()
+            histogram.observe(seconds)
+            for kind, spent in spans.items():
+                histogram = self.spans.get((method, route, kind))
+                if histogram is None:
+                    histogram = self.spans[(method, route, kind)] = Histogram()
+                histogram.observe(spent)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_progress Requests currently being served.",
+                "# TYPE http_requests_in_progress gauge",
+                f"http_requests_in_progress {self.in_progress}",
+                "# HELP http_requests_total Finished requests.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in self.requests.items():
+                lines.append(f'http_requests_total{{method="{method}",route="{_label(route)}",status="{status}"}} {count}')
+            lines += [
+                "# HELP http_request_duration_seconds Request latency until the response starts.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in self.durations.items():
+                lines += histogram.lines("http_request_duration_seconds", f'method="{method}",route="{_label(route)}"')
+            lines += [
+                "# HELP http_request_span_seconds Time per request spent in spans of each kind (io, db, serialize, ...).",
+                "# TYPE http_request_span_seconds histogram",
+            ]
+            for (method, route, kind), histogram in self.spans.items():
+                lines += histogram.lines(
+                    "http_request_span_seconds", f'method="{method}",route="{_label(route)}",kind="{_label(kind)}"'
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def server_timing(spans: Dict[str, float], total: float) -> bytes:
+    parts = [f"{kind};dur={spent * 1000:.2f}" for kind, spent in spans.items()]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """Чистое ASGI-middleware: не буферизует тело и не мешает потоковым ответам."""
+
+    def __init__(self, app, registry: Registry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, float] = {}
+        token = _SPANS.set(spans)
+        start = perf_counter()
+        status, elapsed = 500, None
+
+        async def send_with_timing(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = perf_counter() - start
+                message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", server_timing(spans, elapsed))]}
+            await send(message)
+
+        root_path = scope.get("root_path", "")
+        self.registry.in_progress += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.registry.in_progress -= 1
+            _SPANS.reset(token)
+            # Маршрут роутер проставляет в тот же scope; Mount его не ставит,
+            # но дописывает свой префикс в root_path
+            route = getattr(scope.get("route"), "path", None)
+            if not route:
+                mount = scope.get("root_path", "")[len(root_path):]
+                route = mount + "/{path}" if mount else "unmatched"
+            self.registry.observe(
+                scope["method"], route, status, elapsed if elapsed is not None else perf_counter() - start, spans
+            )
+
+
+def _mark_endpoint_done(endpoint):
+    """Обёртка эндпоинта, запоминающая момент возврата; сигнатуру FastAPI берёт через __wrapped__."""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            done = _ENDPOINT_DONE.get()
+            if done is not None:
+                done.append(perf_counter())
+            return result
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        result = endpoint(*args, **kwargs)
+        done = _ENDPOINT_DONE.get()
+        if done is not None:
+            done.append(perf_counter())
+        return result
+    return wrapper
+
+
+class TimedAPIRoute(APIRoute):
+    """Маршрут, у которого время от возврата из эндпоинта до готового ответа идёт в span "serialize".
+
+    Только публичные точки расширения: обёрнутый эндпоинт и get_route_handler,
+    внутренние функции FastAPI не подменяются.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            spans = _SPANS.get()
+            if spans is None:
+                return await handler(request)
+            done: List[float] = []
+            token = _ENDPOINT_DONE.set(done)
+            try:
+                response = await handler(request)
+            finally:
+                _ENDPOINT_DONE.reset(token)
+            if done:
+                spans["serialize"] = spans.get("serialize", 0.0) + perf_counter() - done[0]
+            return response
+
+        return timed_handler
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def install(app: FastAPI) -> None:
+    """Подключает замеры к приложению; вызывать до объявления эндпоинтов (для класса маршрута)."""
+    if not enabled():
+        return
+    app.router.route_class = TimedAPIRoute
+    app.add_middleware(MetricsMiddleware)
+    app.add_route(METRICS_PATH, metrics_endpoint, include_in_schema=False)
+
+
+def instrument_engine(engine) -> None:
+    """Время SQL-запросов синхронного движка SQLAlchemy (для async — engine.sync_engine) в span "db"."""
+    if not enabled():
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        spans = _SPANS.get()
+        if spans is not None:
+            spans["db"] = spans.get("db", 0.0) + perf_counter() - started
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("metrics_query_start"):
+            connection.info["metrics_query_start"].pop()